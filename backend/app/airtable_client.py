@@ -3,13 +3,124 @@ Airtable client for storing and retrieving user responses.
 Provides a clean interface to the UserResponses table.
 """
 
-from pyairtable import Api
+from pyairtable import Api, retry_strategy
+from requests.adapters import HTTPAdapter
+import contextvars
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Optional, List
 
+from .cache import TTLCache
+from .outbound import governor
+from .storage import AnswerStore
 
-class AirtableClient:
-    def __init__(self):
+# Airtable rejects batch create/update/delete calls with more than 10 records
+AIRTABLE_BATCH_SIZE = 10
+# Airtable allows 5 requests per second per base (per-process share when running several workers)
+AIRTABLE_RATE_LIMIT = float(os.getenv('AIRTABLE_RATE_LIMIT', '5'))
+# Concurrent batch deletes for DELETE /profile (1 = sequential)
+AIRTABLE_DELETE_WORKERS = int(os.getenv('AIRTABLE_DELETE_WORKERS', '1'))
+
+# HTTP session settings for the shared client
+AIRTABLE_POOL_SIZE = int(os.getenv('AIRTABLE_POOL_SIZE', '10'))
+AIRTABLE_CONNECT_TIMEOUT = float(os.getenv('AIRTABLE_CONNECT_TIMEOUT', '5'))
+AIRTABLE_READ_TIMEOUT = float(os.getenv('AIRTABLE_READ_TIMEOUT', '30'))
+AIRTABLE_MAX_RETRIES = int(os.getenv('AIRTABLE_MAX_RETRIES', '5'))
+AIRTABLE_BACKOFF_FACTOR = float(os.getenv('AIRTABLE_BACKOFF_FACTOR', '0.5'))
+AIRTABLE_BACKOFF_JITTER = float(os.getenv('AIRTABLE_BACKOFF_JITTER', '0.5'))
+# Per-user answer cache shared by all clients in the process: {user_id: {question_key: answer}}.
+# It is per process: with several workers, a save handled by one worker is only
+# seen by the others once their entry expires, so the TTL bounds that staleness.
+PROFILE_CACHE_TTL = float(os.getenv('PROFILE_CACHE_TTL', '60'))
+PROFILE_CACHE_SIZE = int(os.getenv('PROFILE_CACHE_SIZE', '1024'))
+_answers_cache = TTLCache(maxsize=PROFILE_CACHE_SIZE, ttl=PROFILE_CACHE_TTL)
+
+# Write generations per user (striped, so memory stays bounded). A read only
+# fills the cache if no write to the user finished while it was in flight.
+_GENERATION_STRIPES = 1024
+_generations = [0] * _GENERATION_STRIPES
+_generations_lock = threading.Lock()
+
+
+def _chunked(items: List, size: int):
+    """Yield successive slices of at most size items."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class _RateLimited(Exception):
+    """A 429 response, raised so governor.call retries it (is_retryable_error reads status_code)."""
+    
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+        self.status_code = response.status_code
+
+
+class _GovernedAdapter(HTTPAdapter):
+    """
+    Connection pool whose every attempt, retries included, takes a slot from
+    the outbound governor. 429s are retried through governor.call, so each
+    retry is paced by the shared bucket and keeps the caller's priority and
+    deadline; urllib3 (max_retries) only retries connection errors.
+    """
+    
+    def __init__(self, upstream: str, retries: int = AIRTABLE_MAX_RETRIES,
+                 backoff: float = AIRTABLE_BACKOFF_FACTOR, **kwargs):
+        self.upstream = upstream
+        self.retries = retries
+        self.backoff = backoff
+        super().__init__(**kwargs)
+    
+    def _attempt(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        if response.status_code == 429:
+            raise _RateLimited(response)
+        return response
+    
+    def send(self, request, **kwargs):
+        try:
+            return governor.call(self.upstream, self._attempt, request, retries=self.retries, backoff=self.backoff, **kwargs)
+        except _RateLimited as e:
+            # Out of retries: hand the 429 to pyairtable, which raises it as an HTTPError
+            return e.response
+
+
+def _cache_generation(user_id: str) -> int:
+    return _generations[hash(user_id) % _GENERATION_STRIPES]
+
+
+def _cache_fill(user_id: str, answers: Dict[str, str], generation: int) -> None:
+    """Cache a profile read that started at `generation`, unless a write finished since."""
+    with _generations_lock:
+        if _cache_generation(user_id) == generation:
+            _answers_cache.set(user_id, dict(answers))
+
+
+def _cache_invalidate(user_id: str) -> None:
+    """Drop the cached profile after a write and fence off reads still in flight."""
+    with _generations_lock:
+        _generations[hash(user_id) % _GENERATION_STRIPES] += 1
+        _answers_cache.invalidate(user_id)
+
+
+class AirtableClient(AnswerStore):
+    name = "airtable"
+    
+    def __init__(
+        self,
+        pool_size: int = AIRTABLE_POOL_SIZE,
+        timeout: tuple = (AIRTABLE_CONNECT_TIMEOUT, AIRTABLE_READ_TIMEOUT),
+        max_retries: int = AIRTABLE_MAX_RETRIES,
+        backoff_factor: float = AIRTABLE_BACKOFF_FACTOR,
+    ):
+        """
+        Meant to be created once per process and shared: the underlying
+        requests session keeps up to pool_size keep-alive connections to
+        api.airtable.com and paces every attempt, 429 retries included,
+        through the outbound governor (jittered exponential backoff).
+        """
         api_key = os.getenv('AIRTABLE_API_KEY')
         base_id = os.getenv('AIRTABLE_BASE_ID')
         table_name = os.getenv('AIRTABLE_TABLE_NAME', 'jobfilling_Data')
@@ -17,10 +128,28 @@ class AirtableClient:
         if not api_key or not base_id:
             raise ValueError("AIRTABLE_API_KEY and AIRTABLE_BASE_ID must be set in environment")
         
-        self.api = Api(api_key)
+        # Connection errors only: 429s are retried by _GovernedAdapter through the governor
+        retry = retry_strategy(
+            status_forcelist=(), total=max_retries, backoff_factor=backoff_factor, backoff_jitter=AIRTABLE_BACKOFF_JITTER
+        )
+        
+        upstream = f"airtable:{base_id}"
+        governor.register(upstream, rate=AIRTABLE_RATE_LIMIT)
+        
+        self.base_id = base_id
+        self.api = Api(api_key, timeout=timeout, retry_strategy=retry)
+        adapter = _GovernedAdapter(
+            upstream, retries=max_retries, backoff=backoff_factor,
+            pool_connections=1, pool_maxsize=pool_size, max_retries=retry
+        )
+        self.api.session.mount("https://", adapter)
         self.base = self.api.base(base_id)
         self.table = self.base.table(table_name)
     
+    def close(self) -> None:
+        """Close pooled connections."""
+        self.api.session.close()
+    
     def save_answer(self, user_id: str, category: str, question_key: str, question_text: str, answer: str) -> dict:
         """
         Save a single question-answer pair for a user.
@@ -37,42 +166,89 @@ class AirtableClient:
             'answer': answer
         }
         
-        if existing:
-            # Update existing record
-            return self.table.update(existing[0]['id'], data)
-        else:
+        try:
+            if existing:
+                # Update existing record
+                return self.table.update(existing[0]['id'], data)
             # Create new record
             return self.table.create(data)
+        finally:
+            _cache_invalidate(user_id)
     
     def save_multiple_answers(self, user_id: str, answers: List[Dict[str, str]]) -> List[dict]:
         """
         Save multiple answers at once (batch operation).
         answers: List of dicts with keys: category, question_key, question_text, answer
+        
+        Existing records are looked up with a single query, then written through
+        Airtable's batch create/update endpoints, AIRTABLE_BATCH_SIZE records per call.
+        Returns one result per question_key: {question_key, success, record_id, error}
         """
-        results = []
+        existing = self.table.all(formula=f"{{user_id}}='{user_id}'", fields=['question_key'])
+        existing_ids = {}
+        for record in existing:
+            existing_ids.setdefault(record['fields'].get('question_key'), record['id'])
+        
+        # Later entries for the same key win, matching sequential saves
+        pending = {}
         for ans in answers:
-            result = self.save_answer(
-                user_id=user_id,
-                category=ans['category'],
-                question_key=ans['question_key'],
-                question_text=ans['question_text'],
-                answer=ans['answer']
-            )
-            results.append(result)
-        return results
+            pending[ans['question_key']] = {
+                'user_id': user_id,
+                'category': ans['category'],
+                'question_key': ans['question_key'],
+                'question_text': ans['question_text'],
+                'answer': ans['answer']
+            }
+        
+        updates = [{'id': existing_ids[key], 'fields': data} for key, data in pending.items() if key in existing_ids]
+        creates = [data for key, data in pending.items() if key not in existing_ids]
+        
+        results = {}
+        try:
+            for chunk in _chunked(updates, AIRTABLE_BATCH_SIZE):
+                self._write_batch(self.table.batch_update, chunk, [r['fields']['question_key'] for r in chunk], results)
+            for chunk in _chunked(creates, AIRTABLE_BATCH_SIZE):
+                self._write_batch(self.table.batch_create, chunk, [r['question_key'] for r in chunk], results)
+        finally:
+            _cache_invalidate(user_id)
+        return [results[key] for key in pending]
+    
+    @staticmethod
+    def _write_batch(write, chunk: List[dict], keys: List[str], results: Dict[str, dict]) -> None:
+        """Run one batch call and record the outcome for every key in it."""
+        try:
+            records = write(chunk)
+        except Exception as e:
+            print(f"[AIRTABLE ERROR] Batch write of {len(chunk)} records failed: {e}")
+            for key in keys:
+                results[key] = {'question_key': key, 'success': False, 'record_id': None, 'error': str(e)}
+            return
+        for key, record in zip(keys, records):
+            results[key] = {'question_key': key, 'success': True, 'record_id': record['id'], 'error': None}
     
     def get_all_answers(self, user_id: str) -> Dict[str, str]:
         """
         Retrieve all answers for a user as a dictionary: {question_key: answer}
         """
+        cached = _answers_cache.get(user_id)
+        if cached is not None:
+            return dict(cached)
+        
+        generation = _cache_generation(user_id)
         records = self.table.all(formula=f"{{user_id}}='{user_id}'")
-        return {r['fields']['question_key']: r['fields']['answer'] for r in records if 'answer' in r['fields']}
+        answers = {r['fields']['question_key']: r['fields']['answer'] for r in records if 'answer' in r['fields']}
+        _cache_fill(user_id, answers, generation)
+        return answers
     
     def get_answer(self, user_id: str, question_key: str) -> Optional[str]:
         """
         Get a specific answer for a user by question key.
         Returns None if not found.
         """
+        cached = _answers_cache.get(user_id)
+        if cached is not None:
+            return cached.get(question_key)
+        
         records = self.table.all(formula=f"AND({{user_id}}='{user_id}', {{question_key}}='{question_key}')")
         if records and 'answer' in records[0]['fields']:
             return records[0]['fields']['answer']
@@ -85,21 +261,36 @@ class AirtableClient:
         records = self.table.all(formula=f"AND({{user_id}}='{user_id}', {{category}}='{category}')")
         return {r['fields']['question_key']: r['fields']['answer'] for r in records if 'answer' in r['fields']}
     
-    def delete_all_answers(self, user_id: str) -> int:
+    def delete_all_answers(self, user_id: str, max_workers: int = AIRTABLE_DELETE_WORKERS) -> Dict[str, int]:
         """
         Delete all answers for a user (for testing/reset purposes).
-        Returns count of deleted records.
+        Record IDs are deleted in batches of AIRTABLE_BATCH_SIZE; with max_workers > 1
+        the batches run concurrently, paced to the base's rate limit by the governor.
+        Returns counts: {"deleted": int, "failed": int}
         """
-        records = self.table.all(formula=f"{{user_id}}='{user_id}'")
-        for record in records:
-            self.table.delete(record['id'])
-        return len(records)
+        records = self.table.all(formula=f"{{user_id}}='{user_id}'", fields=['question_key'])
+        chunks = list(_chunked([r['id'] for r in records], AIRTABLE_BATCH_SIZE))
+        ctx = contextvars.copy_context()
+        
+        def delete_chunk(record_ids: List[str]) -> int:
+            try:
+                return sum(1 for r in self.table.batch_delete(record_ids) if r.get('deleted'))
+            except Exception as e:
+                print(f"[AIRTABLE ERROR] Batch delete of {len(record_ids)} records failed: {e}")
+                return 0
+        
+        workers = max(1, min(max_workers, int(AIRTABLE_RATE_LIMIT), len(chunks)))
+        try:
+            if workers == 1:
+                deleted = sum(delete_chunk(chunk) for chunk in chunks)
+            else:
+                # Workers inherit the caller's outbound priority and deadline
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    deleted = sum(pool.map(lambda chunk: ctx.copy().run(delete_chunk, chunk), chunks))
+        finally:
+            _cache_invalidate(user_id)
+        return {"deleted": deleted, "failed": len(records) - deleted}
     
-    def has_completed_onboarding(self, user_id: str) -> bool:
-        """
-        Check if user has completed onboarding (has at least basic required fields).
-        Required fields: first_name, last_name, email, phone
-        """
-        required_keys = ['first_name', 'last_name', 'email', 'phone']
-        answers = self.get_all_answers(user_id)
-        return all(key in answers and answers[key] for key in required_keys)
+    def stats(self) -> Dict[str, dict]:
+        """Hit/miss/eviction counters of the shared answer cache."""
+        return {"answer_cache": _answers_cache.stats()}
@@ -0,0 +1,125 @@
+"""
+Form-fingerprint cache.
+
+How a form's fields map to question keys depends only on the form (labels,
+names, types, placeholders, context), never on the user filling it, and
+thousands of users apply through the same ATS templates. resolve_form()
+hashes the normalized fields into a fingerprint and caches the resolved
+plan: for every field, whether it is creative, which question key it asks
+for and which key to suggest when the user has no answer. A hit skips
+keyword and semantic matching; only the user's answers are looked up.
+
+Plans live in an in-process LRU, optionally backed by SQLite
+(FORM_CACHE_PATH) so they survive restarts and are shared by workers.
+"""
+
+import hashlib
+import json
+import os
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from .cache import TTLCache, SQLiteCache, TieredCache
+from .matcher import CREATIVE_KEYWORDS, KEYWORD_MAP, MATCHER_INDEX
+from .metrics import stage
+from .semantic import (
+    CONTEXT_CHARS, FIELD_WEIGHTS, NGRAM_RANGE, SEMANTIC_INDEX, SEMANTIC_MARGIN, SEMANTIC_MATCHING, SEMANTIC_THRESHOLD,
+    field_query,
+)
+
+FORM_CACHE_SIZE = int(os.getenv("FORM_CACHE_SIZE", "4096"))
+FORM_CACHE_TTL = float(os.getenv("FORM_CACHE_TTL", "604800"))
+FORM_CACHE_DISK_SIZE = int(os.getenv("FORM_CACHE_DISK_SIZE", "100000"))
+FORM_CACHE_PATH = os.getenv("FORM_CACHE_PATH", "")
+
+_plan_cache = TieredCache(
+    TTLCache(maxsize=FORM_CACHE_SIZE, ttl=FORM_CACHE_TTL),
+    SQLiteCache(FORM_CACHE_PATH, maxsize=FORM_CACHE_DISK_SIZE, ttl=FORM_CACHE_TTL) if FORM_CACHE_PATH else None
+)
+
+# How a field was resolved
+CREATIVE = "creative"
+KEYWORD = "keyword"
+SEMANTIC = "semantic"
+UNMATCHED = "unmatched"
+
+# (kind, question_key, suggested_question_key)
+FieldPlan = Tuple[str, Optional[str], Optional[str]]
+
+
+def _resolver_version() -> str:
+    """Changes whenever the matching rules change, so stale plans are never served."""
+    payload = json.dumps([
+        KEYWORD_MAP, CREATIVE_KEYWORDS, SEMANTIC_INDEX.keys, SEMANTIC_MATCHING,
+        SEMANTIC_THRESHOLD, SEMANTIC_MARGIN, FIELD_WEIGHTS, NGRAM_RANGE, CONTEXT_CHARS,
+    ], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+RESOLVER_VERSION = _resolver_version()
+
+
+def _field_signature(field) -> list:
+    normalize = MATCHER_INDEX.normalize
+    signature = [normalize(field.label), normalize(field.name), (field.type or "text").lower()]
+    # Placeholder and context only influence the semantic stage
+    if SEMANTIC_MATCHING:
+        signature += [normalize(field.placeholder), normalize((field.context or "")[:CONTEXT_CHARS])]
+    return signature
+
+
+def form_fingerprint(fields: Iterable) -> str:
+    """Hash of the normalized (label, name, type[, placeholder, context]) of every field, in order."""
+    payload = json.dumps([RESOLVER_VERSION, [_field_signature(f) for f in fields]], separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def plan_fields(fields: Sequence) -> List[FieldPlan]:
+    """
+    Resolve fields without the cache:
+    A. creative fields (Cover Letter, interest, etc.) are marked for generation;
+    B. everything else gets the key of its longest keyword;
+    C. fields no keyword matched are scored together by the semantic stage.
+    """
+    plans: List[Optional[FieldPlan]] = [None] * len(fields)
+    unmatched = []
+    for i, field in enumerate(fields):
+        search_text = MATCHER_INDEX.normalize(f"{field.label} {field.name}")
+        if MATCHER_INDEX.is_creative(search_text):
+            plans[i] = (CREATIVE, None, MATCHER_INDEX.first_key(search_text))
+            continue
+        with stage("keyword_match"):
+            key = MATCHER_INDEX.best_key(search_text)
+        if key:
+            plans[i] = (KEYWORD, key, MATCHER_INDEX.first_key(search_text))
+        else:
+            unmatched.append(i)
+
+    if unmatched and SEMANTIC_MATCHING:
+        with stage("semantic_match"):
+            keys = SEMANTIC_INDEX.best_keys([
+                field_query(fields[i].label, fields[i].name, fields[i].placeholder, fields[i].context)
+                for i in unmatched
+            ])
+    else:
+        keys = [None] * len(unmatched)
+    for i, key in zip(unmatched, keys):
+        plans[i] = (SEMANTIC, key, key) if key else (UNMATCHED, None, None)
+    return plans
+
+
+def resolve_form(fields: Sequence) -> List[FieldPlan]:
+    """Cached plan_fields(), keyed by the form fingerprint."""
+    if not fields:
+        return []
+    fingerprint = form_fingerprint(fields)
+    cached = _plan_cache.get(fingerprint)
+    if cached is not None:
+        return [tuple(plan) for plan in cached]
+    plans = plan_fields(fields)
+    _plan_cache.set(fingerprint, [list(plan) for plan in plans])
+    return plans
+
+
+def cache_stats() -> dict:
+    """Counters of the form plan cache tiers."""
+    return _plan_cache.stats()
@@ -1,21 +1,235 @@
 import os
+import re
 import json
-from groq import Groq
-from typing import Dict, List, Optional
+import asyncio
+import hashlib
+import weakref
+from groq import Groq, AsyncGroq
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from .cache import TTLCache, SQLiteCache, TieredCache
+from .outbound import UpstreamBusy, governor
+from .metrics import record_llm_usage, stage
+from .questions import get_questions_by_category
+
+# Concurrent Groq generations across the whole process, and within one request
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_REQUEST_CONCURRENCY = int(os.getenv("LLM_REQUEST_CONCURRENCY", "4"))
+
+_global_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _global_llm_slots() -> asyncio.Semaphore:
+    """Process-wide generation semaphore for the running event loop."""
+    loop = asyncio.get_running_loop()
+    slots = _global_slots.get(loop)
+    if slots is None:
+        slots = _global_slots[loop] = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    return slots
+
+
+# Groq tokens-per-minute quota for this process. Each completion reserves its
+# estimated prompt tokens plus max_tokens from the outbound governor before it is sent.
+GROQ_TOKENS_PER_MINUTE = float(os.getenv("GROQ_TOKENS_PER_MINUTE", "12000"))
+governor.register("groq", rate=GROQ_TOKENS_PER_MINUTE / 60, burst=GROQ_TOKENS_PER_MINUTE)
+
+
+# Generated-answer cache. The disk tier is only used when LLM_CACHE_PATH is set.
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "604800"))
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "2048"))
+LLM_CACHE_DISK_SIZE = int(os.getenv("LLM_CACHE_DISK_SIZE", "50000"))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "")
+
+_answer_cache = TieredCache(
+    TTLCache(maxsize=LLM_CACHE_SIZE, ttl=LLM_CACHE_TTL),
+    SQLiteCache(LLM_CACHE_PATH, maxsize=LLM_CACHE_DISK_SIZE, ttl=LLM_CACHE_TTL) if LLM_CACHE_PATH else None
+)
+
+# Cache modes: "use" reads and writes, "refresh" regenerates and overwrites, "bypass" skips the cache
+CACHE_MODES = ("use", "refresh", "bypass")
+
+# Bump when the prompt changes so old generations are not served
+PROMPT_VERSION = 1
+
+
+def answer_cache_key(model: str, field_label: str, job_details: Dict[str, str], profile_facts: Dict[str, str]) -> str:
+    """Content hash of everything that determines a generated answer."""
+    payload = json.dumps({
+        "v": PROMPT_VERSION,
+        "model": model,
+        "field": re.sub(r"\s+", " ", (field_label or "").strip().lower()),
+        "company": job_details.get("company", "Unknown"),
+        "job_title": job_details.get("job_title", "Role"),
+        "profile": profile_facts,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ===== PROMPT COMPACTION =====
+
+# Approximate token budget for the profile section of a prompt
+PROFILE_TOKEN_BUDGET = int(os.getenv("PROFILE_TOKEN_BUDGET", "600"))
+
+# Identity facts always worth sending: the answer is written in the user's voice
+PROMPT_IDENTITY_KEYS = ("first_name", "last_name", "preferred_name", "city", "country")
+
+# Question categories worth sending for free-text questions, most useful first
+PROMPT_CATEGORIES = ("pitch", "work_history", "education", "professional_links")
+
+# Label terms that move a category to the front (or pull in one not sent by default)
+LABEL_CATEGORY_HINTS = {
+    "pitch": ("project", "achievement", "accomplish", "motivat", "proud"),
+    "work_history": ("experience", "role", "job", "position", "employer", "responsibilit"),
+    "education": ("degree", "school", "university", "education", "study", "studies", "graduat"),
+    "professional_links": ("portfolio", "github", "linkedin", "website"),
+    "logistics": ("salary", "compensation", "relocat", "travel", "notice", "remote", "hybrid", "start date"),
+    "legal": ("visa", "sponsor", "authoriz", "authoris", "right to work"),
+}
+
+# Keys that rarely help a written answer unless the label asks for them
+PROMPT_LOW_SIGNAL_KEYS = ("gpa",)
+
+_CATEGORY_KEYS = {cat: [q["key"] for q in questions] for cat, questions in get_questions_by_category().items()}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)."""
+    return max(1, len(text) // 4)
+
+
+def select_profile_facts(field_label: str, user_profile: Dict[str, str], token_budget: int = PROFILE_TOKEN_BUDGET) -> Dict[str, str]:
+    """
+    Pick the profile answers worth sending to the LLM for this field label.
+    Identity keys come first, then categories ordered by relevance to the label,
+    until the token budget is spent. Long answers are truncated to fit.
+    """
+    label = (field_label or "").lower()
+    hinted = [cat for cat, terms in LABEL_CATEGORY_HINTS.items() if any(t in label for t in terms)]
+    categories = hinted + [cat for cat in PROMPT_CATEGORIES if cat not in hinted]
+
+    ordered_keys = list(PROMPT_IDENTITY_KEYS)
+    for cat in categories:
+        ordered_keys.extend(k for k in _CATEGORY_KEYS.get(cat, []) if k not in ordered_keys)
+
+    facts = {}
+    remaining = token_budget
+    # No single answer may take more than half the budget
+    per_fact = max(token_budget // 2, 1)
+    for key in ordered_keys:
+        value = (user_profile.get(key) or "").strip()
+        if not value:
+            continue
+        if key in PROMPT_LOW_SIGNAL_KEYS and key not in label:
+            continue
+        allowed = min(per_fact, remaining)
+        if estimate_tokens(f"{key}: {value}") > allowed:
+            room = (allowed - estimate_tokens(f"{key}: ")) * 4
+            if room < 80:
+                continue
+            value = value[:room].rsplit(" ", 1)[0] + "..."
+        facts[key] = value
+        remaining -= estimate_tokens(f"{key}: {value}")
+    return facts
+
+
+# Largest number of fields generated in one batched completion
+LLM_BATCH_MAX_FIELDS = int(os.getenv("LLM_BATCH_MAX_FIELDS", "6"))
+
+WRITING_RULES = """STRICT WRITING RULES (ANTI-AI SLOP):
+1. **NO AI TONE**: Avoid "I am thrilled," "In today's fast-paced world," "passionate about," or "strive for excellence." Use plain, direct English.
+2. **HUMAN STYLE**: Write like a real person who values time. No empty fluff, no corporate buzzwords (e.g., "synergy," "cutting-edge," "leverage"), and NO long dashes or complex punctuation.
+3. **GENUINE**: Use the actual facts from the User Profile. Do not hallucinate achievements. If the user mentions a project, talk about it simply.
+4. **CONCISE**: Max 2 short paragraphs for cover letters. 1-2 sentences for shorter questions.
+5. **NO TEMPLATES**: Do not use "Dear Hiring Manager" or "Sincerely" unless it is a full cover letter. Even then, keep it grounded.
+6. **JD MATCH**: subtly mention how the user's specific experience (not general skills) fits this specific role/company."""
+
+SYSTEM_PROMPT = "You are a direct, no-nonsense career assistant. You write in a grounded, human-to-human style. You hate AI buzzwords and corporate jargon."
+
 
 class IntelligenceAgent:
     def __init__(self):
         api_key = os.getenv("GROQ_API_KEY")
         if not api_key:
             raise ValueError("GROQ_API_KEY not found in environment")
-        self.client = Groq(api_key=api_key)
+        # Meant to be created once per process (see main.get_intel): each client keeps its own pool.
+        # Retries of 429/5xx are done by the outbound governor, not the SDK
+        self.client = Groq(api_key=api_key, max_retries=0)
+        self.async_client = AsyncGroq(api_key=api_key, max_retries=0)
         self.model = "llama-3.3-70b-versatile"
 
-    def generate_answer(self, field_label: str, user_profile: Dict[str, str], job_details: Dict[str, str]) -> str:
+    async def aclose(self) -> None:
+        """Close both Groq clients' connection pools."""
+        self.client.close()
+        await self.async_client.close()
+
+    @staticmethod
+    def _request_cost(messages: List[Dict[str, str]], max_tokens: int) -> int:
+        """Tokens a completion may consume against the Groq quota."""
+        return sum(estimate_tokens(m["content"]) for m in messages) + max_tokens
+
+    @staticmethod
+    def _settle_usage(usage, cost: int) -> None:
+        """Record token usage and give back the part of the reservation it did not use."""
+        if usage is not None and getattr(usage, "total_tokens", None) is not None:
+            governor.refund("groq", cost - usage.total_tokens)
+            record_llm_usage(usage)
+
+    def _settle(self, completion, cost: int):
+        self._settle_usage(getattr(completion, "usage", None), cost)
+        return completion
+
+    def _complete(self, messages: List[Dict[str, str]], max_tokens: int = 800, **kwargs):
+        """Governed sync chat completion."""
+        cost = self._request_cost(messages, max_tokens)
+        with stage("llm_generate"):
+            completion = governor.call(
+                "groq", self.client.chat.completions.create, cost=cost,
+                model=self.model, messages=messages, temperature=0.6, max_tokens=max_tokens, **kwargs
+            )
+        return self._settle(completion, cost)
+
+    async def _acomplete(self, messages: List[Dict[str, str]], max_tokens: int = 800, **kwargs):
+        """Governed async chat completion."""
+        cost = self._request_cost(messages, max_tokens)
+        with stage("llm_generate"):
+            completion = await governor.acall(
+                "groq", self.async_client.chat.completions.create, cost=cost,
+                model=self.model, messages=messages, temperature=0.6, max_tokens=max_tokens, **kwargs
+            )
+        return self._settle(completion, cost)
+
+    async def _astream(self, messages: List[Dict[str, str]], max_tokens: int = 800):
         """
-        Generate a tailored answer for a complex form field using Groq.
+        Governed streaming chat completion. Returns (stream, reserved cost);
+        usage only arrives on the last chunk, so the caller settles it.
         """
-        profile_summary = "\n".join([f"{k}: {v}" for k, v in user_profile.items()])
+        cost = self._request_cost(messages, max_tokens)
+        with stage("llm_stream_start"):
+            stream = await governor.acall(
+                "groq", self.async_client.chat.completions.create, cost=cost,
+                model=self.model, messages=messages, temperature=0.6, max_tokens=max_tokens, stream=True
+            )
+        return stream, cost
+
+    def _profile_facts(self, field_label: str, user_profile: Dict[str, str]) -> Dict[str, str]:
+        """Profile entries included in the prompt for this field."""
+        return select_profile_facts(field_label, user_profile)
+
+    def _prepare(self, field_label: str, user_profile: Dict[str, str], job_details: Dict[str, str], cache_mode: str):
+        """Profile facts, cache key and (for cache_mode "use") any cached answer for a field."""
+        facts = self._profile_facts(field_label, user_profile)
+        key = answer_cache_key(self.model, field_label, job_details, facts)
+        cached = _answer_cache.get(key) if cache_mode == "use" else None
+        return facts, key, cached
+
+    @staticmethod
+    def _remember(key: str, answer: str, cache_mode: str) -> None:
+        if cache_mode != "bypass" and answer:
+            _answer_cache.set(key, answer)
+
+    def _build_messages(self, field_label: str, profile_facts: Dict[str, str], job_details: Dict[str, str]) -> List[Dict[str, str]]:
+        """Chat messages asking for an answer to one form field."""
+        profile_summary = "\n".join([f"{k}: {v}" for k, v in profile_facts.items()])
         job_summary = f"Company: {job_details.get('company', 'Unknown')}\nRole: {job_details.get('job_title', 'Role')}"
 
         prompt = f"""
@@ -27,31 +241,269 @@ class IntelligenceAgent:
         CONTEXT (JOB):
         {job_summary}
 
-        STRICT WRITING RULES (ANTI-AI SLOP):
-        1. **NO AI TONE**: Avoid "I am thrilled," "In today's fast-paced world," "passionate about," or "strive for excellence." Use plain, direct English.
-        2. **HUMAN STYLE**: Write like a real person who values time. No empty fluff, no corporate buzzwords (e.g., "synergy," "cutting-edge," "leverage"), and NO long dashes or complex punctuation.
-        3. **GENUINE**: Use the actual facts from the User Profile. Do not hallucinate achievements. If the user mentions a project, talk about it simply.
-        4. **CONCISE**: Max 2 short paragraphs for cover letters. 1-2 sentences for shorter questions.
-        5. **NO TEMPLATES**: Do not use "Dear Hiring Manager" or "Sincerely" unless it is a full cover letter. Even then, keep it grounded.
-        6. **JD MATCH**: subtly mention how the user's specific experience (not general skills) fits this specific role/company.
+        {WRITING_RULES}
 
         RETURN ONLY THE FINAL TEXT. NO PREAMBLE.
         """
 
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _build_batch_messages(self, field_labels: List[str], profile_facts: Dict[str, str], job_details: Dict[str, str]) -> List[Dict[str, str]]:
+        """Chat messages asking for answers to several form fields as one JSON object."""
+        profile_summary = "\n".join([f"{k}: {v}" for k, v in profile_facts.items()])
+        job_summary = f"Company: {job_details.get('company', 'Unknown')}\nRole: {job_details.get('job_title', 'Role')}"
+        questions = "\n".join(f"Q{i}: {label}" for i, label in enumerate(field_labels, start=1))
+
+        prompt = f"""
+        Write a professional, direct, and human-sounding answer for EACH of these job application questions:
+        {questions}
+
+        USER PROFILE:
+        {profile_summary}
+
+        CONTEXT (JOB):
+        {job_summary}
+
+        {WRITING_RULES}
+
+        RETURN ONLY A JSON OBJECT of the form {{"answers": {{"Q1": "...", "Q2": "..."}}}} with one final answer per question. NO PREAMBLE.
+        """
+
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+
+    @staticmethod
+    def _parse_batch_answers(content: str, count: int) -> List[Optional[str]]:
+        """Answers by position from a batch completion; None where one is missing or unusable."""
+        data = json.loads(content)
+        answers = data.get("answers", data) if isinstance(data, dict) else {}
+        if not isinstance(answers, dict):
+            raise ValueError("batch completion has no answers object")
+        parsed = []
+        for i in range(1, count + 1):
+            value = answers.get(f"Q{i}", answers.get(str(i)))
+            parsed.append(value.strip() if isinstance(value, str) and value.strip() else None)
+        return parsed
+
+    def generate_answer(self, field_label: str, user_profile: Dict[str, str], job_details: Dict[str, str], cache_mode: str = "use") -> str:
+        """
+        Generate a tailored answer for a complex form field using Groq.
+        Successful generations are cached by content hash (see answer_cache_key).
+        """
+        facts, key, cached = self._prepare(field_label, user_profile, job_details, cache_mode)
+        if cached is not None:
+            return cached
+
         try:
-            completion = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are a direct, no-nonsense career assistant. You write in a grounded, human-to-human style. You hate AI buzzwords and corporate jargon."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.6,
-                max_tokens=800
-            )
-            return completion.choices[0].message.content.strip()
+            completion = self._complete(self._build_messages(field_label, facts, job_details))
+            answer = completion.choices[0].message.content.strip()
+        except UpstreamBusy:
+            # No quota before the deadline: not an answer, let the caller decide
+            raise
         except Exception as e:
             print(f"[GROQ ERROR] {e}")
             return f"Error generating answer: {str(e)}"
+
+        self._remember(key, answer, cache_mode)
+        return answer
+
+    async def agenerate_answer(self, field_label: str, user_profile: Dict[str, str], job_details: Dict[str, str], cache_mode: str = "use") -> str:
+        """
+        Async generate_answer. Waits for a slot under LLM_MAX_CONCURRENCY.
+        Raises UpstreamBusy when the Groq quota has no room before the deadline.
+        """
+        facts, key, cached = self._prepare(field_label, user_profile, job_details, cache_mode)
+        if cached is not None:
+            return cached
+
+        try:
+            async with _global_llm_slots():
+                completion = await self._acomplete(self._build_messages(field_label, facts, job_details))
+            answer = completion.choices[0].message.content.strip()
+        except UpstreamBusy:
+            raise
+        except Exception as e:
+            print(f"[GROQ ERROR] {e}")
+            return f"Error generating answer: {str(e)}"
+
+        self._remember(key, answer, cache_mode)
+        return answer
+
+    async def astream_answer(self, field_label: str, user_profile: Dict[str, str], job_details: Dict[str, str], cache_mode: str = "use") -> AsyncIterator[str]:
+        """
+        Stream a generated answer as text chunks while Groq produces it.
+        A cached answer is yielded as a single chunk. Errors are raised to the caller.
+        """
+        facts, key, cached = self._prepare(field_label, user_profile, job_details, cache_mode)
+        if cached is not None:
+            yield cached
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        async def pump() -> None:
+            # Holds the slot only while Groq streams; chunks are buffered in the
+            # queue, so a slow reader of the response cannot keep the slot
+            parts = []
+            try:
+                async with _global_llm_slots():
+                    stream, cost = await self._astream(self._build_messages(field_label, facts, job_details))
+                    async for chunk in stream:
+                        # Groq reports usage on the last chunk
+                        usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+                        if usage is not None:
+                            self._settle_usage(usage, cost)
+                        text = chunk.choices[0].delta.content if chunk.choices else None
+                        if text:
+                            # Mirror the .strip() of the non-streaming path at the start of the answer
+                            if not parts:
+                                text = text.lstrip()
+                                if not text:
+                                    continue
+                            parts.append(text)
+                            queue.put_nowait(text)
+                self._remember(key, "".join(parts).strip(), cache_mode)
+                queue.put_nowait(done)
+            except Exception as e:
+                queue.put_nowait(e)
+
+        task = asyncio.ensure_future(pump())
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # The consumer stopped early (e.g. the client disconnected)
+            task.cancel()
+
+    async def _agenerate_or_none(self, field_label: str, user_profile: Dict[str, str], job_details: Dict[str, str], cache_mode: str) -> Optional[str]:
+        """agenerate_answer, with None (a missing field) when the Groq quota is exhausted."""
+        try:
+            return await self.agenerate_answer(field_label, user_profile, job_details, cache_mode)
+        except UpstreamBusy as e:
+            print(f"[GROQ BUSY] {field_label}: {e}")
+            return None
+
+    async def agenerate_answers(
+        self,
+        field_labels: List[str],
+        user_profile: Dict[str, str],
+        job_details: Dict[str, str],
+        max_concurrency: int = LLM_REQUEST_CONCURRENCY,
+        cache_mode: str = "use"
+    ) -> List[Optional[str]]:
+        """
+        Generate answers for several fields concurrently.
+        At most max_concurrency run at once for this call; results keep input order.
+        Fields the Groq quota had no room for are None.
+        """
+        request_slots = asyncio.Semaphore(max_concurrency)
+
+        async def generate(label: str) -> Optional[str]:
+            async with request_slots:
+                return await self._agenerate_or_none(label, user_profile, job_details, cache_mode)
+
+        return list(await asyncio.gather(*(generate(label) for label in field_labels)))
+
+    async def agenerate_answers_batch(
+        self,
+        field_labels: List[str],
+        user_profile: Dict[str, str],
+        job_details: Dict[str, str],
+        cache_mode: str = "use"
+    ) -> List[Optional[str]]:
+        """
+        Generate answers for several fields with one JSON completion per
+        LLM_BATCH_MAX_FIELDS labels, so the system prompt and profile are sent once.
+        Cached answers are reused; fields the batch output does not cover
+        (or a batch that fails to parse) fall back to per-field generation.
+        Fields the Groq quota had no room for are None.
+        """
+        results: List[Optional[str]] = [None] * len(field_labels)
+        busy = set()  # indexes whose batch hit UpstreamBusy; retrying them per field would wait again
+        pending = []  # (index, facts, key)
+        for i, label in enumerate(field_labels):
+            facts, key, cached = self._prepare(label, user_profile, job_details, cache_mode)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append((i, facts, key))
+
+        async def run_batch(batch: List[tuple]) -> None:
+            labels = [field_labels[i] for i, _, _ in batch]
+            facts = {}
+            for _, field_facts, _ in batch:
+                facts.update(field_facts)
+            try:
+                async with _global_llm_slots():
+                    completion = await self._acomplete(
+                        self._build_batch_messages(labels, facts, job_details),
+                        max_tokens=800 * len(batch),
+                        response_format={"type": "json_object"}
+                    )
+                answers = self._parse_batch_answers(completion.choices[0].message.content, len(batch))
+            except UpstreamBusy as e:
+                print(f"[GROQ BUSY] Batch of {len(batch)} fields: {e}")
+                busy.update(i for i, _, _ in batch)
+                answers = [None] * len(batch)
+            except Exception as e:
+                print(f"[GROQ ERROR] Batch of {len(batch)} fields failed, generating individually: {e}")
+                answers = [None] * len(batch)
+            for (i, _, key), answer in zip(batch, answers):
+                if answer:
+                    results[i] = answer
+                    self._remember(key, answer, cache_mode)
+
+        if len(pending) > 1:
+            batches = [pending[n:n + LLM_BATCH_MAX_FIELDS] for n in range(0, len(pending), LLM_BATCH_MAX_FIELDS)]
+            await asyncio.gather(*(run_batch(batch) for batch in batches))
+
+        leftovers = [i for i, _, _ in pending if results[i] is None and i not in busy]
+        if leftovers:
+            fallback = await self.agenerate_answers(
+                [field_labels[i] for i in leftovers], user_profile, job_details, cache_mode=cache_mode
+            )
+            for i, answer in zip(leftovers, fallback):
+                results[i] = answer
+        return results
+
+    async def agenerate_answers_as_completed(
+        self,
+        field_labels: List[str],
+        user_profile: Dict[str, str],
+        job_details: Dict[str, str],
+        max_concurrency: int = LLM_REQUEST_CONCURRENCY,
+        cache_mode: str = "use"
+    ) -> AsyncIterator[Tuple[int, Optional[str]]]:
+        """
+        Like agenerate_answers, but yields (index, answer) as each generation finishes.
+        Pending generations are cancelled if the consumer stops early.
+        """
+        request_slots = asyncio.Semaphore(max_concurrency)
+
+        async def generate(index: int, label: str) -> Tuple[int, Optional[str]]:
+            async with request_slots:
+                return index, await self._agenerate_or_none(label, user_profile, job_details, cache_mode)
+
+        tasks = [asyncio.ensure_future(generate(i, label)) for i, label in enumerate(field_labels)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    def cache_stats() -> Dict[str, Optional[Dict[str, float]]]:
+        """Counters of the generated-answer cache tiers."""
+        return _answer_cache.stats()
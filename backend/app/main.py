@@ -4,48 +4,121 @@ Architecture: Questionnaire → Airtable → Keyword Matching
 """
 
 import os
-from typing import List, Optional
+import json
+import math
+import hashlib
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import Dict, List, Literal, Optional, Tuple
 from fastapi import FastAPI, HTTPException, Header
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, field_validator
 from dotenv import load_dotenv
 from fastapi import Depends
 
-from .airtable_client import AirtableClient
-from .matcher import FieldMatcher
+# Load .env before importing modules that read their settings at import time
+load_dotenv()
+
+from .storage import AsyncAnswerStore, create_answer_store
+from .matcher import FieldMatcher, MATCHER_INDEX
+from .form_cache import CREATIVE, resolve_form, cache_stats as form_cache_stats
 from .intelligence import IntelligenceAgent
-from .questions import QUESTION_CATALOG, get_questions_by_category, get_question_by_key
+from .rate_limit import TokenBucketLimiter, create_bucket_store
+from .outbound import BULK, INTERACTIVE, UpstreamBusy, governor, outbound_context
+from .metrics import REQUEST_SECONDS, render_metrics, reset_request_timer, stage, start_request_timer
+from .questions import QUESTIONS_RESPONSE, CATEGORY_RESPONSES, get_question_by_key
 
-load_dotenv()
 API_KEY = os.getenv("JOBFILL_API_KEY", "")
 API_KEY_HEADER = "x-jobfill-api-key"
 
 RATE_LIMIT_WINDOW = 60  # seconds
-RATE_LIMIT_MAX = 60     # requests per window
-_rate_store: Dict[str, Dict[str, float]] = {}  # {api_key: {"count": int, "reset": timestamp}}
-
-def _check_rate_limit(key: str):
-    now = time.time()
-    info = _rate_store.get(key)
-    if not info or now > info["reset"]:
-        _rate_store[key] = {"count": 1, "reset": now + RATE_LIMIT_WINDOW}
-        return
-    info["count"] += 1
-    if info["count"] > RATE_LIMIT_MAX:
-        raise HTTPException(status_code=429, detail="Rate limit exceeded")
-
-async def verify_api_key(x_jobfill_api_key: str = Header(...)):
+RATE_LIMIT_MAX = int(os.getenv("RATE_LIMIT_MAX", "60"))            # requests per window per API key
+RATE_LIMIT_USER_MAX = int(os.getenv("RATE_LIMIT_USER_MAX", "30"))  # requests per window per x-user-id
+
+# Token buckets in the store chosen by RATE_LIMIT_BACKEND (memory | sqlite | redis)
+_rate_store = create_bucket_store()
+_key_limiter = TokenBucketLimiter(_rate_store, RATE_LIMIT_MAX, RATE_LIMIT_WINDOW, prefix="key:")
+_user_limiter = TokenBucketLimiter(_rate_store, RATE_LIMIT_USER_MAX, RATE_LIMIT_WINDOW, prefix="user:")
+
+def _check_rate_limit(limiter: TokenBucketLimiter, key: str):
+    allowed, retry_after = limiter.hit(key)
+    if not allowed:
+        raise HTTPException(
+            status_code=429,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+def verify_api_key(x_jobfill_api_key: str = Header(...), x_user_id: Optional[str] = Header(None)):
+    # Plain def: FastAPI runs it in the threadpool, so a sqlite/redis bucket store never blocks the event loop
     if not API_KEY:
         raise HTTPException(status_code=500, detail="Server API key not configured")
     if x_jobfill_api_key != API_KEY:
         raise HTTPException(status_code=401, detail="Unauthorized")
-    _check_rate_limit(x_jobfill_api_key)
+    # Bucket keys are hashed so API keys are never written to a shared store
+    _check_rate_limit(_key_limiter, hashlib.sha256(x_jobfill_api_key.encode()).hexdigest()[:32])
+    if x_user_id:
+        _check_rate_limit(_user_limiter, x_user_id)
     return True
 
 
 
+# ===== SHARED CLIENTS =====
+
+_store: Optional[AsyncAnswerStore] = None
+_store_lock = threading.Lock()
+
+def get_store() -> AsyncAnswerStore:
+    """
+    Process-wide async answer store (backend chosen by ANSWER_STORE).
+    Created on first use if startup could not build it (e.g. missing config).
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = AsyncAnswerStore(create_answer_store())
+    return _store
+
+_intel: Optional[IntelligenceAgent] = None
+_intel_lock = threading.Lock()
+
+def get_intel() -> IntelligenceAgent:
+    """
+    Process-wide Groq agent, so every request shares its clients' keep-alive
+    connections. Created on first use if startup could not build it.
+    """
+    global _intel
+    if _intel is None:
+        with _intel_lock:
+            if _intel is None:
+                _intel = IntelligenceAgent()
+    return _intel
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _store, _intel
+    try:
+        get_store()
+    except ValueError as e:
+        print(f"[STARTUP] Answer store not initialised: {e}")
+    try:
+        get_intel()
+    except ValueError as e:
+        print(f"[STARTUP] Groq client not initialised: {e}")
+    yield
+    if _store is not None:
+        _store.close()
+        _store = None
+    if _intel is not None:
+        await _intel.aclose()
+        _intel = None
+    _rate_store.close()
+
+
 #creating fastapi app
-app = FastAPI(title="JobFill Pro API - Pure Matching Edition")
+app = FastAPI(title="JobFill Pro API - Pure Matching Edition", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -56,7 +129,8 @@ app.add_middleware(
 
 # Global Exception Handler for improved debugging
 from fastapi import Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Match
 import traceback
 
 @app.exception_handler(Exception)
@@ -68,6 +142,54 @@ async def global_exception_handler(request: Request, exc: Exception):
         content={"detail": "Internal Server Error", "trace": str(exc)},
     )
 
+@app.exception_handler(UpstreamBusy)
+async def upstream_busy_handler(request: Request, exc: UpstreamBusy):
+    print(f"[OUTBOUND] {exc}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+    )
+
+# Bulk endpoints yield Airtable/Groq quota to interactive ones
+BULK_ROUTES = {("POST", "/save-answers"), ("DELETE", "/profile")}
+
+@app.middleware("http")
+async def outbound_priority(request: Request, call_next):
+    """Every outbound call made while serving the request inherits its priority and deadline."""
+    priority = BULK if (request.method, request.url.path) in BULK_ROUTES else INTERACTIVE
+    with outbound_context(priority):
+        return await call_next(request)
+
+# Add a Server-Timing header with per-stage durations to every response
+SERVER_TIMING = os.getenv("SERVER_TIMING", "").lower() in ("1", "true", "yes")
+
+def _route_label(request: Request) -> str:
+    """Route template (e.g. /questions/{category}) so metric labels stay low-cardinality."""
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+@app.middleware("http")
+async def request_metrics(request: Request, call_next):
+    """
+    Time the request and collect its stage timings.
+    For streaming endpoints the duration ends when the response headers are sent.
+    """
+    timer, token = start_request_timer(_route_label(request))
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        reset_request_timer(token)
+        REQUEST_SECONDS.observe(timer.elapsed(), route=timer.route, method=request.method, status=str(status))
+    if SERVER_TIMING:
+        response.headers["Server-Timing"] = timer.server_timing()
+    return response
+
 # ===== MODELS =====
 
 class FormField(BaseModel):
@@ -85,6 +207,40 @@ class AutofillRequest(BaseModel):
     fields: List[FormField]
     company_name: str = "Unknown"
     job_title: str = "Role"
+    # "refresh" regenerates creative answers, "bypass" skips the answer cache
+    cache_mode: Literal["use", "refresh", "bypass"] = "use"
+
+class AutofillGroup(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    group_id: str  # e.g. frame id or form step
+    fields: List[FormField]
+    company_name: Optional[str] = None  # defaults to the batch-level value
+    job_title: Optional[str] = None
+
+class BatchAutofillRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    groups: List[AutofillGroup]
+    company_name: str = "Unknown"
+    job_title: str = "Role"
+    cache_mode: Literal["use", "refresh", "bypass"] = "use"
+
+    @field_validator("groups")
+    @classmethod
+    def unique_group_ids(cls, groups: List[AutofillGroup]) -> List[AutofillGroup]:
+        """Results are keyed by group_id, so a duplicate would silently drop a group."""
+        seen, duplicates = set(), set()
+        for group in groups:
+            (duplicates if group.group_id in seen else seen).add(group.group_id)
+        if duplicates:
+            raise ValueError(f"duplicate group_id: {', '.join(sorted(duplicates))}")
+        return groups
+
+class GenerateRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    field_label: str
+    company_name: str = "Unknown"
+    job_title: str = "Role"
+    cache_mode: Literal["use", "refresh", "bypass"] = "use"
 
 class SaveAnswerRequest(BaseModel):
     question_key: str
@@ -94,6 +250,112 @@ class SaveMultipleAnswersRequest(BaseModel):
     answers: List[dict]  # [{question_key, answer}, ...]
 
 
+# ===== HELPERS =====
+
+# The catalog only changes on deploy; profiles must be revalidated on every read
+CATALOG_CACHE_CONTROL = "public, max-age=3600"
+PROFILE_CACHE_CONTROL = "private, no-cache"
+
+def _valid_fields(fields: List[FormField]) -> List[FormField]:
+    """Filter out ghost fields that have neither an id nor a name."""
+    return [f for f in fields if (f.id and f.id.strip()) or (f.name and f.name.strip())]
+
+def _field_key(field: FormField) -> str:
+    """Use ID as primary key, fall back to name"""
+    return field.id if field.id and field.id.strip() else field.name
+
+def _missing_field(field: FormField, question_key: Optional[str]) -> dict:
+    """Couldn't match - suggest what question this might be"""
+    return {
+        "field_label": field.label,
+        "suggested_question_key": question_key
+    }
+
+def _form_plan(fields: List[FormField]):
+    """Per-field (kind, question key, suggested key) from the form-fingerprint cache."""
+    with stage("form_plan"):
+        return resolve_form(fields)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header value lists etag (weak comparison) or is *"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def _not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+def _json_with_etag(body: bytes, etag: str, if_none_match: Optional[str], cache_control: str = CATALOG_CACHE_CONTROL) -> Response:
+    """Pre-serialized JSON body, or 304 Not Modified when the client already has it."""
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(etag, cache_control)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag, "Cache-Control": cache_control})
+
+def _serialized(payload: dict) -> Response:
+    """JSON response, serialized under the "serialize" stage."""
+    with stage("serialize"):
+        body = json.dumps(payload).encode("utf-8")
+    return Response(content=body, media_type="application/json")
+
+
+async def _resolve_field_groups(
+    groups: List[Tuple[List[FormField], Dict[str, str]]],
+    matcher: FieldMatcher,
+    intel: IntelligenceAgent,
+    user_answers: Dict[str, str],
+    cache_mode: str
+) -> List[dict]:
+    """
+    Resolve groups of (valid fields, job details) into /autofill results.
+    Each group's field plan (keyword, then semantic matching) comes from the
+    form-fingerprint cache, so only the user's answers are looked up per request.
+    Creative fields (Cover Letter, interest, etc.) of all groups are generated
+    together, one batch per distinct job context.
+    """
+    values = [[None] * len(fields) for fields, _ in groups]
+    plans = [_form_plan(fields) for fields, _ in groups]
+    creative: Dict[Tuple[str, str], List[Tuple[int, int]]] = {}
+    for g, (fields, job_details) in enumerate(groups):
+        for i, (field, (kind, key, _)) in enumerate(zip(fields, plans[g])):
+            if kind == CREATIVE:
+                print(f"[AUTOFILL] Using Groq for complex field: {field.label}")
+                creative.setdefault((job_details["company"], job_details["job_title"]), []).append((g, i))
+            elif key:
+                values[g][i] = matcher.answer_for_key(key, field.type, field.options)
+    
+    async def generate(job: Tuple[str, str], positions: List[Tuple[int, int]]) -> None:
+        generated = await intel.agenerate_answers_batch(
+            [groups[g][0][i].label for g, i in positions],
+            user_profile=user_answers,
+            job_details={"company": job[0], "job_title": job[1]},
+            cache_mode=cache_mode
+        )
+        for (g, i), value in zip(positions, generated):
+            values[g][i] = value
+    
+    if creative:
+        await asyncio.gather(*(generate(job, positions) for job, positions in creative.items()))
+    
+    results = []
+    for (fields, _), group_values, plan in zip(groups, values, plans):
+        mappings = {}
+        missing_fields = []
+        for field, value, (_, _, suggested) in zip(fields, group_values, plan):
+            if value:
+                mappings[_field_key(field)] = value
+            else:
+                missing_fields.append(_missing_field(field, suggested))
+        results.append({
+            "mappings": mappings,
+            "missing_fields": missing_fields,
+            "total_fields": len(fields),
+            "matched_count": len(mappings)
+        })
+    return results
+
+
 # ===== ENDPOINTS =====
 
 @app.get("/")
@@ -107,51 +369,62 @@ async def root():
 
 
 @app.get("/questions", dependencies=[Depends(verify_api_key)])
-async def get_questions():
+async def get_questions(if_none_match: Optional[str] = Header(None)):
     """
     Get all available questions organized by category.
     Used by frontend to build the onboarding questionnaire.
+    The body is serialized once at startup; clients can revalidate with If-None-Match.
     """
-    return {
-        "categories": get_questions_by_category(),
-        "total_questions": len(QUESTION_CATALOG)
-    }
+    body, etag = QUESTIONS_RESPONSE
+    return _json_with_etag(body, etag, if_none_match)
 
 
 @app.get("/questions/{category}")
-async def get_questions_for_category(category: str):
+async def get_questions_for_category(category: str, if_none_match: Optional[str] = Header(None)):
     """Get questions for a specific category"""
-    questions_by_cat = get_questions_by_category()
-    if category not in questions_by_cat:
+    if category not in CATEGORY_RESPONSES:
         raise HTTPException(404, f"Category '{category}' not found")
-    return questions_by_cat[category]
+    body, etag = CATEGORY_RESPONSES[category]
+    return _json_with_etag(body, etag, if_none_match)
 
 
 @app.get("/profile", dependencies=[Depends(verify_api_key)])
-async def get_profile(x_user_id: str = Header(...)):
+async def get_profile(x_user_id: str = Header(...), if_none_match: Optional[str] = Header(None)):
     """
-    Get user's stored answers from Airtable.
+    Get user's stored answers.
     Returns all question-answer pairs.
+    The ETag is the profile version; a matching If-None-Match gets 304.
     """
     try:
-        airtable = AirtableClient()
-        answers = airtable.get_all_answers(x_user_id)
-        completed = airtable.has_completed_onboarding(x_user_id)
-        
-        return {
-            "user_id": x_user_id,
-            "answers": answers,
-            "completed_onboarding": completed,
-            "answer_count": len(answers)
-        }
+        store = get_store()
+        snapshot = await store.get_profile_snapshot(x_user_id)
+    except UpstreamBusy:
+        raise
     except Exception as e:
         raise HTTPException(500, f"Failed to retrieve profile: {str(e)}")
+    
+    etag = f'"{snapshot["version"]}"'
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(etag, PROFILE_CACHE_CONTROL)
+    
+    body = json.dumps({
+        "user_id": x_user_id,
+        "answers": snapshot["answers"],
+        "completed_onboarding": snapshot["completed_onboarding"],
+        "answer_count": len(snapshot["answers"]),
+        "category_counts": snapshot["category_counts"]
+    }).encode("utf-8")
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": PROFILE_CACHE_CONTROL, "Vary": "x-user-id"}
+    )
 
 
 @app.post("/save-answer", dependencies=[Depends(verify_api_key)])
 async def save_single_answer(request: SaveAnswerRequest, x_user_id: str = Header(...)):
     """
-    Save a single answer to Airtable.
+    Save a single answer.
     Updates if already exists.
     """
     try:
@@ -159,8 +432,8 @@ async def save_single_answer(request: SaveAnswerRequest, x_user_id: str = Header
         if not question:
             raise HTTPException(404, f"Question key '{request.question_key}' not found")
         
-        airtable = AirtableClient()
-        result = airtable.save_answer(
+        store = get_store()
+        result = await store.save_answer(
             user_id=x_user_id,
             category=question['category'],
             question_key=request.question_key,
@@ -169,6 +442,8 @@ async def save_single_answer(request: SaveAnswerRequest, x_user_id: str = Header
         )
         
         return {"success": True, "question_key": request.question_key}
+    except UpstreamBusy:
+        raise
     except Exception as e:
         raise HTTPException(500, f"Failed to save answer: {str(e)}")
 
@@ -179,7 +454,7 @@ async def save_multiple_answers(request: SaveMultipleAnswersRequest, x_user_id:
     Save multiple answers at once (for bulk onboarding).
     """
     try:
-        airtable = AirtableClient()
+        store = get_store()
         formatted_answers = []
         
         for answer_data in request.answers:
@@ -192,12 +467,19 @@ async def save_multiple_answers(request: SaveMultipleAnswersRequest, x_user_id:
                     'answer': answer_data['answer']
                 })
         
-        airtable.save_multiple_answers(x_user_id, formatted_answers)
+        results = await store.save_multiple_answers(x_user_id, formatted_answers)
+        failed = [
+            {"question_key": r['question_key'], "error": r['error']}
+            for r in results if not r['success']
+        ]
         
         return {
-            "success": True,
-            "saved_count": len(formatted_answers)
+            "success": not failed,
+            "saved_count": len(results) - len(failed),
+            "failed": failed
         }
+    except UpstreamBusy:
+        raise
     except Exception as e:
         raise HTTPException(500, f"Failed to save answers: {str(e)}")
 
@@ -209,100 +491,242 @@ async def autofill_form(request: AutofillRequest, x_user_id: str = Header(...)):
     NO LLM/AI - only keyword matching against stored answers.
     """
     try:
-        # 1. Get user's stored answers from Airtable
-        airtable = AirtableClient()
-        user_answers = airtable.get_all_answers(x_user_id)
+        # 1. Get user's stored answers
+        store = get_store()
+        with stage("store_fetch"):
+            user_answers = await store.get_all_answers(x_user_id)
         
         if not user_answers or len(user_answers) == 0:
             raise HTTPException(404, "Please complete onboarding first. No answers found.")
         
         # 2. Use pure keyword matching + LLM intelligence
-        matcher = FieldMatcher(user_answers)
-        intel = IntelligenceAgent()
-        mappings = {}
-        missing_fields = []
+        with stage("matcher_build"):
+            matcher = FieldMatcher(user_answers, MATCHER_INDEX)
+        intel = get_intel()
         
         # Filter out ghost fields
-        valid_fields = [f for f in request.fields if (f.id and f.id.strip()) or (f.name and f.name.strip())]
+        valid_fields = _valid_fields(request.fields)
+        job_details = {"company": request.company_name, "job_title": request.job_title}
         
-        for field in valid_fields:
-            # A. Check if it's a creative field (Cover Letter, interest, etc.)
-            if matcher.is_creative_field(field.label, field.name):
-                print(f"[AUTOFILL] Using Groq for complex field: {field.label}")
-                value = intel.generate_answer(
-                    field_label=field.label,
+        [result] = await _resolve_field_groups(
+            [(valid_fields, job_details)], matcher, intel, user_answers, request.cache_mode
+        )
+        
+        print(f"[AUTOFILL] Mapped {result['matched_count']} fields for {x_user_id}")
+        print(f"[AUTOFILL] Missing {len(result['missing_fields'])} fields")
+        
+        return _serialized(result)
+        
+    except (HTTPException, UpstreamBusy):
+        raise
+    except Exception as e:
+        print(f"[AUTOFILL ERROR] {e}")
+        return {"mappings": {}, "missing_fields": [], "error": str(e)}
+
+
+@app.post("/autofill/batch", dependencies=[Depends(verify_api_key)])
+async def autofill_form_batch(request: BatchAutofillRequest, x_user_id: str = Header(...)):
+    """
+    Autofill several frames/forms of one application in a single call.
+    The profile is loaded once and all groups share one matcher; creative
+    fields from every group are generated together.
+    Returns /autofill-style results keyed by group_id.
+    """
+    try:
+        store = get_store()
+        with stage("store_fetch"):
+            user_answers = await store.get_all_answers(x_user_id)
+        
+        if not user_answers:
+            raise HTTPException(404, "Please complete onboarding first. No answers found.")
+        
+        with stage("matcher_build"):
+            matcher = FieldMatcher(user_answers, MATCHER_INDEX)
+        intel = get_intel()
+        
+        groups = [
+            (_valid_fields(group.fields), {
+                "company": group.company_name or request.company_name,
+                "job_title": group.job_title or request.job_title
+            })
+            for group in request.groups
+        ]
+        results = await _resolve_field_groups(groups, matcher, intel, user_answers, request.cache_mode)
+        
+        matched = sum(r["matched_count"] for r in results)
+        print(f"[AUTOFILL] Mapped {matched} fields across {len(results)} groups for {x_user_id}")
+        
+        return _serialized({
+            "groups": {group.group_id: result for group, result in zip(request.groups, results)},
+            "total_fields": sum(r["total_fields"] for r in results),
+            "matched_count": matched
+        })
+        
+    except (HTTPException, UpstreamBusy):
+        raise
+    except Exception as e:
+        print(f"[AUTOFILL ERROR] {e}")
+        return {"groups": {}, "error": str(e)}
+
+
+@app.post("/autofill/stream", dependencies=[Depends(verify_api_key)])
+async def autofill_form_stream(request: AutofillRequest, x_user_id: str = Header(...)):
+    """
+    Streaming variant of /autofill as NDJSON.
+    One {"type": "mapping", "field_key", "value"} line is sent per resolved field
+    as soon as it is ready (keyword matches first, generated answers as each
+    completes), then a final {"type": "summary", ...} line.
+    """
+    store = get_store()
+    with stage("store_fetch"):
+        user_answers = await store.get_all_answers(x_user_id)
+    
+    if not user_answers:
+        raise HTTPException(404, "Please complete onboarding first. No answers found.")
+    
+    with stage("matcher_build"):
+        matcher = FieldMatcher(user_answers, MATCHER_INDEX)
+    intel = get_intel()
+    valid_fields = _valid_fields(request.fields)
+    
+    def frame(payload: dict) -> bytes:
+        return (json.dumps(payload) + "\n").encode("utf-8")
+    
+    async def frames():
+        mappings = {}
+        missing_fields = []
+        creative_fields = []
+        
+        try:
+            plan = _form_plan(valid_fields)
+            for field, (kind, key, suggested) in zip(valid_fields, plan):
+                if kind == CREATIVE:
+                    creative_fields.append((field, suggested))
+                    continue
+                value = matcher.answer_for_key(key, field.type, field.options) if key else None
+                if value:
+                    mappings[_field_key(field)] = value
+                    yield frame({"type": "mapping", "field_key": _field_key(field), "value": value})
+                else:
+                    missing_fields.append(_missing_field(field, suggested))
+            
+            if creative_fields:
+                print(f"[AUTOFILL] Streaming Groq answers for {len(creative_fields)} complex fields")
+                generated = intel.agenerate_answers_as_completed(
+                    [f.label for f, _ in creative_fields],
                     user_profile=user_answers,
                     job_details={
                         "company": request.company_name,
                         "job_title": request.job_title
-                    }
-                )
-            else:
-                # B. Try to find a matching question key (Direct match)
-                value = matcher.match_field(
-                    field_label=field.label,
-                    field_name=field.name,
-                    field_type=field.type,
-                    options=field.options
+                    },
+                    cache_mode=request.cache_mode
                 )
-            
-            if value:
-                # Use ID as primary key, fall back to name
-                field_key = field.id if field.id and field.id.strip() else field.name
-                mappings[field_key] = value
-            else:
-                # Couldn't match - suggest what question this might be
-                suggested_key = matcher.suggest_question_key(field.label, field.name)
-                missing_fields.append({
-                    "field_label": field.label,
-                    "suggested_question_key": suggested_key
-                })
+                async for i, value in generated:
+                    field, suggested = creative_fields[i]
+                    if value:
+                        mappings[_field_key(field)] = value
+                        yield frame({"type": "mapping", "field_key": _field_key(field), "value": value})
+                    else:
+                        missing_fields.append(_missing_field(field, suggested))
+        except Exception as e:
+            print(f"[AUTOFILL ERROR] {e}")
+            yield frame({"type": "error", "error": str(e)})
         
-        print(f"[AUTOFILL] Mapped {len(mappings)} fields for {x_user_id}")
-        print(f"[AUTOFILL] Missing {len(missing_fields)} fields")
-        
-        return {
-            "mappings": mappings,
+        print(f"[AUTOFILL] Streamed {len(mappings)} fields for {x_user_id}")
+        yield frame({
+            "type": "summary",
             "missing_fields": missing_fields,
             "total_fields": len(valid_fields),
             "matched_count": len(mappings)
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"[AUTOFILL ERROR] {e}")
-        return {"mappings": {}, "missing_fields": [], "error": str(e)}
+        })
+    
+    return StreamingResponse(frames(), media_type="application/x-ndjson")
+
+
+@app.post("/generate/stream", dependencies=[Depends(verify_api_key)])
+async def generate_answer_stream(request: GenerateRequest, x_user_id: str = Header(...)):
+    """
+    Stream the generated answer for one creative field as NDJSON.
+    Sends {"type": "token", "text"} lines as Groq produces them, then
+    {"type": "done"} (or {"type": "error", "error"}).
+    """
+    store = get_store()
+    with stage("store_fetch"):
+        user_answers = await store.get_all_answers(x_user_id)
+    
+    if not user_answers:
+        raise HTTPException(404, "Please complete onboarding first. No answers found.")
+    
+    intel = get_intel()
+    
+    def frame(payload: dict) -> bytes:
+        return (json.dumps(payload) + "\n").encode("utf-8")
+    
+    async def frames():
+        try:
+            async for text in intel.astream_answer(
+                field_label=request.field_label,
+                user_profile=user_answers,
+                job_details={
+                    "company": request.company_name,
+                    "job_title": request.job_title
+                },
+                cache_mode=request.cache_mode
+            ):
+                yield frame({"type": "token", "text": text})
+        except Exception as e:
+            print(f"[GROQ ERROR] {e}")
+            yield frame({"type": "error", "error": str(e)})
+            return
+        yield frame({"type": "done"})
+    
+    return StreamingResponse(frames(), media_type="application/x-ndjson")
 
 
 @app.delete("/profile", dependencies=[Depends(verify_api_key)])
 async def delete_profile(x_user_id: str = Header(...)):
     """
-    Delete all user data from Airtable (for testing/reset).
+    Delete all stored user data (for testing/reset).
     """
     try:
-        airtable = AirtableClient()
-        count = airtable.delete_all_answers(x_user_id)
-        return {"success": True, "deleted_count": count}
+        store = get_store()
+        counts = await store.delete_all_answers(x_user_id)
+        return {
+            "success": counts["failed"] == 0,
+            "deleted_count": counts["deleted"],
+            "failed_count": counts["failed"]
+        }
+    except UpstreamBusy:
+        raise
     except Exception as e:
         raise HTTPException(500, f"Failed to delete profile: {str(e)}")
 
 
+@app.get("/metrics", dependencies=[Depends(verify_api_key)])
+async def metrics():
+    """Request and stage latency histograms plus LLM token counts, in Prometheus text format."""
+    return Response(content=render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/health", dependencies=[Depends(verify_api_key)])
 async def health_check():
     """Health check endpoint"""
     try:
-        # Test Airtable connection
-        airtable = AirtableClient()
+        # Test store connection
+        store = get_store()
         return {
             "status": "healthy",
-            "database": "airtable",
-            "connection": "ok"
+            "database": store.name,
+            "connection": "ok",
+            "storage": store.stats(),
+            "llm_cache": IntelligenceAgent.cache_stats(),
+            "form_cache": form_cache_stats(),
+            "outbound": governor.stats()
         }
     except Exception as e:
         return {
             "status": "degraded",
-            "database": "airtable",
+            "database": os.getenv("ANSWER_STORE", "airtable"),
             "connection": "failed",
             "error": str(e)
         }
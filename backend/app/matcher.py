@@ -3,129 +3,381 @@ Pure keyword-based matcher for form fields.
 NO AI/LLM - only deterministic string matching.
 """
 
-from typing import Optional, List, Dict
+from collections import deque
+from types import MappingProxyType
+from typing import Optional, List, Dict, Iterable, Set, Tuple
+import os
 import re
 
+from .cache import TTLCache
+
+
+# Keywords that suggest a field needs AI generation rather than simple matching
+CREATIVE_KEYWORDS = [
+    'cover letter', 'why do you want', 'interest you', 'tell us about', 
+    'describe your experience', 'statement', 'additional information',
+    'why should we hire', 'about yourself', 'briefly explain'
+]
+
+# Comprehensive keyword mappings for each question key
+KEYWORD_MAP = {
+    # Personal Information
+    'full_name': ['full name', 'complete name', 'name', 'your name'],
+    'first_name': ['first', 'firstname', 'fname', 'given', 'forename'],
+    'middle_name': ['middle', 'middlename', 'mname'],
+    'last_name': ['last', 'lastname', 'lname', 'surname', 'family'],
+    'preferred_name': ['preferred', 'nickname', 'goes by'],
+    'email': ['email', 'e-mail', 'mail'],
+    'phone': ['phone', 'mobile', 'cell', 'telephone', 'tel', 'contact number'],
+    'street_address': ['street', 'address line', 'address 1'],
+    'city': ['city', 'town'],
+    'state_province': ['state', 'province', 'region'],
+    'postal_code': ['zip', 'postal', 'postcode', 'zipcode'],
+    'country': ['country', 'nation'],
+    
+    # Professional Links
+    'linkedin_url': ['linkedin', 'linkedin.com', 'linkedin profile'],
+    'portfolio_url': ['portfolio', 'website', 'personal site'],
+    'github_url': ['github', 'github.com', 'github profile'],
+    'behance_url': ['behance', 'behance.net'],
+    'dribbble_url': ['dribbble', 'dribbble.com'],
+    'twitter_handle': ['twitter', 'x.com', 'handle'],
+    
+    # Education
+    'highest_degree': ['degree', 'education level', 'highest education'],
+    'school_name': ['school', 'university', 'college', 'institution'],
+    'major_field_of_study': ['major', 'field of study', 'concentration', 'degree in'],
+    'graduation_date': ['graduation', 'graduated', 'graduation date'],
+    'gpa': ['gpa', 'grade point'],
+    
+    # Work History
+    'current_company': ['current company', 'employer', 'current employer', 'company name'],
+    'current_job_title': ['current title', 'job title', 'position', 'role'],
+    'current_job_start_date': ['start date', 'from', 'employment start'],
+    'current_job_end_date': ['end date', 'to', 'employment end'],
+    'current_job_duties': ['responsibilities', 'duties', 'job description'],
+    
+    # Logistics
+    'availability_date': ['available', 'start date', 'earliest start', 'when can you start', 'date available'],
+    'work_type_preference': ['work type', 'employment type', 'full-time', 'part-time', 'office', 'home', 'hybrid', 'remote', 'office days'],
+    'salary_expectation': ['salary', 'desired salary', 'expected salary', 'compensation', 'remuneration'],
+    'willing_to_relocate': ['relocate', 'relocation', 'willing to move'],
+    'willing_to_travel': ['travel', 'willing to travel'],
+    'notice_period': ['notice', 'notice period', 'availability'],
+    
+    # Legal
+    'legally_authorized_to_work': ['authorized', 'right to work', 'work authorization', 'legally work', 'authorized to work'],
+    'require_visa_sponsorship': ['visa', 'sponsorship', 'work permit', 'visa sponsorship', 'require sponsorship', 'need sponsorship'],
+    'age_over_18': ['18', 'age', 'over 18', 'at least 18'],
+    
+    # Screening
+    'how_did_you_hear': ['how did you hear', 'source', 'referral source'],
+    'employee_referral_name': ['referred by', 'referral', 'employee name'],
+    'previously_applied': ['previously applied', 'applied before', 'worked here'],
+    'relatives_at_company': ['relatives', 'family members'],
+    
+    # Self-ID
+    'gender': ['gender', 'sex'],
+    'race_ethnicity': ['race', 'ethnicity', 'ethnic'],
+    'veteran_status': ['veteran', 'military'],
+    'disability_status': ['disability', 'disabled'],
+    
+    # Accessibility
+    'require_accommodations': ['accommodation', 'disability', 'accessible'],
+    'accommodation_details': ['accommodation details', 'specific needs']
+}
+
+
+# Option spellings that mean the same thing (compared after option normalization)
+OPTION_SYNONYMS = [
+    ('yes', 'y', 'true'),
+    ('no', 'n', 'false'),
+    ('united states', 'united states of america', 'usa', 'us', 'u s', 'u s a', 'america'),
+    ('united kingdom', 'uk', 'u k', 'great britain', 'britain', 'gb'),
+    ('united arab emirates', 'uae'),
+    ('male', 'man'),
+    ('female', 'woman'),
+    ('non binary', 'nonbinary'),
+    ('decline to self identify', 'prefer not to say', 'prefer not to answer', 'decline to answer',
+     'i don t wish to answer', 'i prefer not to say'),
+    ('high school diploma', 'high school', 'secondary school'),
+    ('bachelor s degree', 'bachelors degree', 'bachelor s', 'bachelors', 'bachelor', 'ba', 'bs', 'bsc', 'b sc'),
+    ('master s degree', 'masters degree', 'master s', 'masters', 'master', 'ms', 'msc', 'm sc', 'ma'),
+    ('phd', 'ph d', 'doctorate', 'doctoral degree'),
+    ('full time', 'fulltime'),
+    ('part time', 'parttime'),
+    ('linkedin', 'linked in'),
+]
+
+# Stored answers that stand for yes/no but are never treated as option spellings
+ANSWER_ALIASES = {'1': 'yes', '0': 'no'}
+
+OPTION_INDEX_CACHE_SIZE = int(os.getenv("OPTION_INDEX_CACHE_SIZE", "512"))
+
+
+class OptionIndex:
+    """
+    Lookup structure over one select/radio options list, built once and
+    shared by every request that sends the same list.
+
+    match() tries, in order: exact match of the normalized answer, synonym
+    match (USA / United States, Y / Yes, ...), token containment (every
+    answer word is in the option or every option word is in the answer)
+    and finally a plain substring scan. Each stage returns the earliest
+    matching option in list order.
+    """
+
+    __slots__ = ('options', 'lowered', 'exact', 'canonical', 'postings', 'token_counts')
+
+    _non_word_re = re.compile(r'[\W_]+')
+    _synonyms = {variant: group[0] for group in OPTION_SYNONYMS for variant in group}
+
+    @classmethod
+    def normalize(cls, text: str) -> str:
+        return cls._non_word_re.sub(' ', text.lower()).strip()
+
+    def __init__(self, options: Iterable[str]):
+        self.options: Tuple[str, ...] = tuple(options)
+        self.lowered: Tuple[str, ...] = tuple(option.lower() for option in self.options)
+        self.exact: Dict[str, int] = {}
+        self.canonical: Dict[str, int] = {}
+        self.postings: Dict[str, List[int]] = {}
+        self.token_counts: List[int] = []
+        for i, option in enumerate(self.options):
+            normalized = self.normalize(option)
+            self.exact.setdefault(normalized, i)
+            self.canonical.setdefault(self._synonyms.get(normalized, normalized), i)
+            tokens = set(normalized.split())
+            self.token_counts.append(len(tokens))
+            for token in tokens:
+                self.postings.setdefault(token, []).append(i)
+
+    def match(self, answer: str) -> Optional[str]:
+        normalized = self.normalize(answer)
+        if not normalized:
+            return None
+        
+        i = self.exact.get(normalized)
+        if i is None:
+            canonical = ANSWER_ALIASES.get(normalized) or self._synonyms.get(normalized, normalized)
+            i = self.canonical.get(canonical)
+        if i is None:
+            i = self._token_match(normalized)
+        if i is None:
+            i = self._substring_match(answer.lower())
+        return self.options[i] if i is not None else None
+
+    def _token_match(self, normalized: str) -> Optional[int]:
+        """Earliest option containing all answer tokens, or whose tokens are all in the answer."""
+        tokens = set(normalized.split())
+        hits: Dict[int, int] = {}
+        for token in tokens:
+            for i in self.postings.get(token, ()):
+                hits[i] = hits.get(i, 0) + 1
+        candidates = [i for i, count in hits.items() if count == len(tokens) or count == self.token_counts[i]]
+        return min(candidates) if candidates else None
+
+    def _substring_match(self, answer_lower: str) -> Optional[int]:
+        """Fallback for partial words ("engineer" in "Engineering"); blank options never match."""
+        for i, option in enumerate(self.lowered):
+            if option and (answer_lower in option or option in answer_lower):
+                return i
+        return None
+
+
+_option_indexes = TTLCache(maxsize=OPTION_INDEX_CACHE_SIZE, ttl=3600.0)
+
+
+def option_index(options: Iterable[str]) -> OptionIndex:
+    """Shared OptionIndex for an options list (LRU-cached by its contents)."""
+    key = tuple(options)
+    index = _option_indexes.get(key)
+    if index is None:
+        index = OptionIndex(key)
+        _option_indexes.set(key, index)
+    return index
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a fixed set of keywords.
+    Finds every keyword occurring as a substring of a text in a single pass,
+    independent of how many keywords are registered.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[tuple] = [()]
+
+        for kw in keywords:
+            if not kw:
+                continue
+            state = 0
+            for ch in kw:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = nxt
+            if kw not in self._out[state]:
+                self._out[state] = self._out[state] + (kw,)
+
+        # Breadth-first pass to wire failure links and merge outputs along them
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def search(self, text: str) -> Set[str]:
+        """Return the set of keywords that occur anywhere in text."""
+        found: Set[str] = set()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+class MatcherIndex:
+    """
+    Immutable, process-wide matching index.
+    Holds the keyword tables, their compiled automata and the normalization
+    regexes so that per-request matchers only carry the user's answers.
+    """
+
+    __slots__ = (
+        'keyword_map', 'creative_keywords', 'keyword_owners',
+        'keyword_automaton', 'creative_automaton',
+        '_non_word_re', '_whitespace_re',
+    )
+
+    def __init__(self, keyword_map: Dict[str, List[str]], creative_keywords: Iterable[str]):
+        keyword_map = MappingProxyType({key: tuple(kws) for key, kws in keyword_map.items()})
+        creative_keywords = tuple(creative_keywords)
+
+        # Each keyword maps to (priority, question_key) of the first key that lists it.
+        # Priority follows declaration order so ties resolve exactly like a linear scan.
+        owners = {}
+        for priority, (key, keywords) in enumerate(keyword_map.items()):
+            for kw in keywords:
+                owners.setdefault(kw, (priority, key))
+
+        object.__setattr__(self, 'keyword_map', keyword_map)
+        object.__setattr__(self, 'creative_keywords', creative_keywords)
+        object.__setattr__(self, 'keyword_owners', MappingProxyType(owners))
+        object.__setattr__(self, 'keyword_automaton', KeywordAutomaton(owners))
+        object.__setattr__(self, 'creative_automaton', KeywordAutomaton(creative_keywords))
+        object.__setattr__(self, '_non_word_re', re.compile(r'[^\w\s]'))
+        object.__setattr__(self, '_whitespace_re', re.compile(r'\s+'))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("MatcherIndex is immutable")
+
+    def normalize(self, text: str) -> str:
+        """Normalize text for matching: lowercase, remove extra spaces"""
+        if not text:
+            return ""
+        # Remove special characters but keep spaces
+        text = self._non_word_re.sub(' ', text.lower())
+        return self._whitespace_re.sub(' ', text.strip())
+
+    def best_key(self, search_text: str) -> Optional[str]:
+        """Question key of the LONGEST keyword found in search_text."""
+        found = self.keyword_automaton.search(search_text)
+        if not found:
+            return None
+        owners = self.keyword_owners
+        # Ties go to the key declared first in the keyword map.
+        best_kw = max(found, key=lambda kw: (len(kw), -owners[kw][0]))
+        return owners[best_kw][1]
+
+    def first_key(self, search_text: str) -> Optional[str]:
+        """Question key declared first among all keys with a keyword in search_text."""
+        found = self.keyword_automaton.search(search_text)
+        if not found:
+            return None
+        return min(self.keyword_owners[kw] for kw in found)[1]
+
+    def is_creative(self, search_text: str) -> bool:
+        return bool(self.creative_automaton.search(search_text))
+
+
+# Built once at import time and shared by every FieldMatcher
+MATCHER_INDEX = MatcherIndex(KEYWORD_MAP, CREATIVE_KEYWORDS)
+
 
 class FieldMatcher:
-    def __init__(self, user_answers: Dict[str, str]):
+    """
+    Per-request view over a user's answers.
+    All keyword data lives in the shared MatcherIndex.
+    """
+
+    __slots__ = ('answers', 'index')
+
+    def __init__(self, user_answers: Dict[str, str], index: MatcherIndex = MATCHER_INDEX):
         """
         Initialize with user's stored answers.
         user_answers: {question_key: answer}
         """
         self.answers = user_answers
-        
-        # Keywords that suggest a field needs AI generation rather than simple matching
-        self.creative_keywords = [
-            'cover letter', 'why do you want', 'interest you', 'tell us about', 
-            'describe your experience', 'statement', 'additional information',
-            'why should we hire', 'about yourself', 'briefly explain'
-        ]
-        
-        # Comprehensive keyword mappings for each question key
-        self.keyword_map = {
-            # Personal Information
-            'full_name': ['full name', 'complete name', 'name', 'your name'],
-            'first_name': ['first', 'firstname', 'fname', 'given', 'forename'],
-            'middle_name': ['middle', 'middlename', 'mname'],
-            'last_name': ['last', 'lastname', 'lname', 'surname', 'family'],
-            'preferred_name': ['preferred', 'nickname', 'goes by'],
-            'email': ['email', 'e-mail', 'mail'],
-            'phone': ['phone', 'mobile', 'cell', 'telephone', 'tel', 'contact number'],
-            'street_address': ['street', 'address line', 'address 1'],
-            'city': ['city', 'town'],
-            'state_province': ['state', 'province', 'region'],
-            'postal_code': ['zip', 'postal', 'postcode', 'zipcode'],
-            'country': ['country', 'nation'],
-            
-            # Professional Links
-            'linkedin_url': ['linkedin', 'linkedin.com', 'linkedin profile'],
-            'portfolio_url': ['portfolio', 'website', 'personal site'],
-            'github_url': ['github', 'github.com', 'github profile'],
-            'behance_url': ['behance', 'behance.net'],
-            'dribbble_url': ['dribbble', 'dribbble.com'],
-            'twitter_handle': ['twitter', 'x.com', 'handle'],
-            
-            # Education
-            'highest_degree': ['degree', 'education level', 'highest education'],
-            'school_name': ['school', 'university', 'college', 'institution'],
-            'major_field_of_study': ['major', 'field of study', 'concentration', 'degree in'],
-            'graduation_date': ['graduation', 'graduated', 'graduation date'],
-            'gpa': ['gpa', 'grade point'],
-            
-            # Work History
-            'current_company': ['current company', 'employer', 'current employer', 'company name'],
-            'current_job_title': ['current title', 'job title', 'position', 'role'],
-            'current_job_start_date': ['start date', 'from', 'employment start'],
-            'current_job_end_date': ['end date', 'to', 'employment end'],
-            'current_job_duties': ['responsibilities', 'duties', 'job description'],
-            
-            # Logistics
-            'availability_date': ['available', 'start date', 'earliest start', 'when can you start', 'date available'],
-            'work_type_preference': ['work type', 'employment type', 'full-time', 'part-time', 'office', 'home', 'hybrid', 'remote', 'office days'],
-            'salary_expectation': ['salary', 'desired salary', 'expected salary', 'compensation', 'remuneration'],
-            'willing_to_relocate': ['relocate', 'relocation', 'willing to move'],
-            'willing_to_travel': ['travel', 'willing to travel'],
-            'notice_period': ['notice', 'notice period', 'availability'],
-            
-            # Legal
-            'legally_authorized_to_work': ['authorized', 'right to work', 'work authorization', 'legally work', 'authorized to work'],
-            'require_visa_sponsorship': ['visa', 'sponsorship', 'work permit', 'visa sponsorship', 'require sponsorship', 'need sponsorship'],
-            'age_over_18': ['18', 'age', 'over 18', 'at least 18'],
-            
-            # Screening
-            'how_did_you_hear': ['how did you hear', 'source', 'referral source'],
-            'employee_referral_name': ['referred by', 'referral', 'employee name'],
-            'previously_applied': ['previously applied', 'applied before', 'worked here'],
-            'relatives_at_company': ['relatives', 'family members'],
-            
-            # Self-ID
-            'gender': ['gender', 'sex'],
-            'race_ethnicity': ['race', 'ethnicity', 'ethnic'],
-            'veteran_status': ['veteran', 'military'],
-            'disability_status': ['disability', 'disabled'],
-            
-            # Accessibility
-            'require_accommodations': ['accommodation', 'disability', 'accessible'],
-            'accommodation_details': ['accommodation details', 'specific needs']
-        }
+        self.index = index
+    
+    @property
+    def keyword_map(self):
+        return self.index.keyword_map
+    
+    @property
+    def creative_keywords(self):
+        return self.index.creative_keywords
     
     def normalize(self, text: str) -> str:
         """Normalize text for matching: lowercase, remove extra spaces"""
-        if not text:
-            return ""
-        # Remove special characters but keep spaces
-        text = re.sub(r'[^\w\s]', ' ', text.lower())
-        return re.sub(r'\s+', ' ', text.strip())
+        return self.index.normalize(text)
     
     def match_field(self, field_label: str, field_name: str = "", field_type: str = "text", options: List[str] = None) -> Optional[str]:
         """
         Match a form field to a stored answer using keyword matching.
         Returns the answer if a match is found, None otherwise.
         """
-        # Combine label and name for matching
-        search_text = self.normalize(f"{field_label} {field_name}")
-        
-        # Priority matching: find the LONGEST keyword that matches.
-        best_match_key = None
-        best_match_len = 0
-        
-        for key, keywords in self.keyword_map.items():
-            for kw in keywords:
-                if kw in search_text:
-                    if len(kw) > best_match_len:
-                        best_match_len = len(kw)
-                        best_match_key = key
-        
+        best_match_key = self.resolve_key(field_label, field_name)
         if not best_match_key:
             return None
-            
+        return self.answer_for_key(best_match_key, field_type, options)
+    
+    def resolve_key(self, field_label: str, field_name: str = "") -> Optional[str]:
+        """
+        Question key a field asks for, independent of the user's answers.
+        Priority matching: the LONGEST keyword found in label + name wins.
+        """
+        search_text = self.normalize(f"{field_label} {field_name}")
+        return self.index.best_key(search_text)
+    
+    def answer_for_key(self, question_key: str, field_type: str = "text", options: List[str] = None) -> Optional[str]:
+        """
+        The user's answer for a question key, adapted to the field's options.
+        Returns None if the user has no answer for it.
+        """
         # 1. Direct answer found
-        if best_match_key in self.answers:
-            answer = self.answers[best_match_key]
+        if question_key in self.answers:
+            answer = self.answers[question_key]
         
         # 2. Synthetic field: Full Name from First + Last
-        elif best_match_key == 'full_name' and 'first_name' in self.answers and 'last_name' in self.answers:
+        elif question_key == 'full_name' and 'first_name' in self.answers and 'last_name' in self.answers:
             answer = f"{self.answers['first_name']} {self.answers['last_name']}"
             
         else:
@@ -141,31 +393,9 @@ class FieldMatcher:
     def _match_to_option(self, answer: str, options: List[str]) -> Optional[str]:
         """
         Match a stored answer to one of the available options.
-        Uses fuzzy matching for flexibility.
+        Uses fuzzy matching for flexibility (see OptionIndex).
         """
-        answer_lower = answer.lower()
-        
-        # First try exact match
-        for option in options:
-            if option.lower() == answer_lower:
-                return option
-        
-        # Then try partial match
-        for option in options:
-            if answer_lower in option.lower() or option.lower() in answer_lower:
-                return option
-        
-        # Special handling for Yes/No questions
-        if answer_lower in ['yes', 'y', 'true', '1']:
-            for option in options:
-                if option.lower() in ['yes', 'y']:
-                    return option
-        elif answer_lower in ['no', 'n', 'false', '0']:
-            for option in options:
-                if option.lower() in ['no', 'n']:
-                    return option
-        
-        return None
+        return option_index(options).match(answer)
     
     def suggest_question_key(self, field_label: str, field_name: str = "") -> Optional[str]:
         """
@@ -174,13 +404,9 @@ class FieldMatcher:
         """
         search_text = self.normalize(f"{field_label} {field_name}")
         
-        for key, keywords in self.keyword_map.items():
-            if any(kw in search_text for kw in keywords):
-                return key
-        
-        return None
+        return self.index.first_key(search_text)
 
     def is_creative_field(self, field_label: str, field_name: str = "") -> bool:
         """Check if a field requires creative writing (AI)."""
         search_text = self.normalize(f"{field_label} {field_name}")
-        return any(kw in search_text for kw in self.creative_keywords)
+        return self.index.is_creative(search_text)
@@ -0,0 +1,199 @@
+"""
+Request instrumentation: per-stage timings and Prometheus-style metrics.
+
+Each request gets a StageTimer in a context variable. Code on the request
+path wraps its work in `with stage("name"):` (Airtable fetch, matching,
+LLM generation, ...); every occurrence is observed in the stage histogram
+and summed on the timer, which the app can report in a Server-Timing
+header. Context variables are copied into asyncio tasks and offloaded
+threads, so concurrent work (e.g. parallel generations) lands on the same
+timer; its per-stage totals can therefore exceed wall time.
+
+Metrics are kept per process and rendered in the Prometheus text format.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+# Seconds; covers sub-millisecond matching up to slow LLM generations
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    labels = _format_labels(self.labelnames, key, f'le="{_format_number(bound)}"')
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_number(series[-2])}")
+                lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+# ===== METRICS =====
+
+REQUEST_SECONDS = Histogram(
+    "jobfill_request_duration_seconds", "End-to-end request latency.", ["route", "method", "status"]
+)
+STAGE_SECONDS = Histogram(
+    "jobfill_stage_duration_seconds", "Latency of one occurrence of a request stage.", ["route", "stage"]
+)
+LLM_TOKENS = Counter(
+    "jobfill_llm_tokens_total", "Groq tokens consumed.", ["kind"]
+)
+LLM_COMPLETION_TOKENS = Histogram(
+    "jobfill_llm_completion_tokens", "Completion tokens per Groq call.", [], buckets=TOKEN_BUCKETS
+)
+
+REGISTRY = (REQUEST_SECONDS, STAGE_SECONDS, LLM_TOKENS, LLM_COMPLETION_TOKENS)
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ===== PER-REQUEST TIMING =====
+
+class StageTimer:
+    """Accumulates stage durations (and LLM token counts) for one request."""
+
+    def __init__(self, route: str = "unmatched"):
+        self.route = route
+        self.started = time.perf_counter()
+        self.stages: Dict[str, List[float]] = {}  # stage -> [total seconds, occurrences]
+        self.tokens = {"prompt": 0, "completion": 0}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            entry = self.stages.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def add_tokens(self, prompt: int, completion: int) -> None:
+        with self._lock:
+            self.tokens["prompt"] += prompt
+            self.tokens["completion"] += completion
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: one metric per stage plus the total, in milliseconds."""
+        with self._lock:
+            parts = []
+            for name, (seconds, count) in self.stages.items():
+                desc = f';desc="{count}x"' if count > 1 else ""
+                parts.append(f"{name};dur={seconds * 1000:.2f}{desc}")
+            if self.tokens["prompt"] or self.tokens["completion"]:
+                parts.append(f'llm_tokens;desc="prompt={self.tokens["prompt"]} completion={self.tokens["completion"]}"')
+        parts.append(f"total;dur={self.elapsed() * 1000:.2f}")
+        return ", ".join(parts)
+
+
+_timer: contextvars.ContextVar = contextvars.ContextVar("request_timer", default=None)
+
+
+def start_request_timer(route: str) -> Tuple[StageTimer, contextvars.Token]:
+    timer = StageTimer(route)
+    return timer, _timer.set(timer)
+
+
+def reset_request_timer(token: contextvars.Token) -> None:
+    _timer.reset(token)
+
+
+@contextmanager
+def stage(name: str):
+    """Time the block as one occurrence of `name` on the current request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        timer = _timer.get()
+        if timer is not None:
+            timer.add(name, seconds)
+        STAGE_SECONDS.observe(seconds, route=timer.route if timer is not None else "background", stage=name)
+
+
+def record_llm_usage(usage) -> None:
+    """Count the prompt/completion tokens of a Groq usage object (ignored when missing)."""
+    prompt = getattr(usage, "prompt_tokens", None) or 0
+    completion = getattr(usage, "completion_tokens", None) or 0
+    if not (prompt or completion):
+        return
+    LLM_TOKENS.inc(prompt, kind="prompt")
+    LLM_TOKENS.inc(completion, kind="completion")
+    LLM_COMPLETION_TOKENS.observe(completion)
+    timer = _timer.get()
+    if timer is not None:
+        timer.add_tokens(prompt, completion)
@@ -0,0 +1,235 @@
+"""
+Outbound call governor for rate-limited upstreams (Airtable, Groq).
+
+Every upstream gets a token bucket sized to its quota. Callers wait in a
+priority queue for tokens instead of firing requests that would come back
+as 429s: interactive work (/autofill) is served before bulk work
+(/save-answers, DELETE /profile), and a caller that cannot be served before
+its deadline gets UpstreamBusy. 429s (and 5xx) that still happen are retried
+with jittered exponential backoff.
+
+Priority and deadline are carried in context variables, so endpoints set
+them once and every call made on their behalf (including calls offloaded
+to worker threads with a copied context) inherits them.
+
+Limits are per process: with several workers, configure each one with its
+share of the quota.
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Lower value = served first
+INTERACTIVE = 0
+BULK = 10
+
+# Default time a caller may wait for a slot, per priority (seconds)
+DEFAULT_DEADLINES = {INTERACTIVE: 15.0, BULK: 60.0}
+
+# Upper bound on a single sleep while waiting, so queued callers notice new heads quickly
+_POLL_INTERVAL = 0.05
+
+_priority: contextvars.ContextVar = contextvars.ContextVar("outbound_priority", default=INTERACTIVE)
+_deadline: contextvars.ContextVar = contextvars.ContextVar("outbound_deadline", default=None)
+
+
+class UpstreamBusy(Exception):
+    """An upstream had no capacity for this call before the caller's deadline."""
+
+    def __init__(self, upstream: str, retry_after: float = 1.0):
+        super().__init__(f"{upstream} is at its rate limit, try again shortly")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+@contextmanager
+def outbound_context(priority: int = INTERACTIVE, timeout: Optional[float] = None):
+    """
+    Set the priority and deadline for outbound calls made inside the block.
+    timeout defaults to DEFAULT_DEADLINES for the priority.
+    """
+    if timeout is None:
+        timeout = DEFAULT_DEADLINES.get(priority, DEFAULT_DEADLINES[BULK])
+    priority_token = _priority.set(priority)
+    deadline_token = _deadline.set(time.monotonic() + timeout)
+    try:
+        yield
+    finally:
+        _priority.reset(priority_token)
+        _deadline.reset(deadline_token)
+
+
+def is_retryable_error(exc: BaseException) -> bool:
+    """True for HTTP 429/5xx errors from requests/pyairtable or the Groq SDK."""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status == 429 or (isinstance(status, int) and status >= 500)
+
+
+class _Upstream:
+    """Token bucket plus the queue of callers waiting on it. Guarded by the governor lock."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.waiting: list = []  # heap of (priority, seq)
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class OutboundGovernor:
+    def __init__(self):
+        self._upstreams: Dict[str, _Upstream] = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self.granted = 0
+        self.rejected = 0
+        self.retried = 0
+
+    def register(self, name: str, rate: float, burst: Optional[float] = None) -> None:
+        """Declare an upstream allowing `rate` units per second (idempotent)."""
+        with self._lock:
+            if name not in self._upstreams:
+                self._upstreams[name] = _Upstream(rate, burst if burst is not None else rate)
+
+    # ----- slot acquisition -----
+
+    def _enqueue(self, name: str, priority: Optional[int]) -> tuple:
+        if priority is None:
+            priority = _priority.get()
+        ticket = (priority, next(self._seq))
+        with self._lock:
+            heapq.heappush(self._upstreams[name].waiting, ticket)
+        return ticket
+
+    def _try_take(self, name: str, ticket: tuple, cost: float) -> float:
+        """Grant the slot if ticket is at the head and tokens suffice. Returns seconds to wait (0 = granted)."""
+        with self._lock:
+            upstream = self._upstreams[name]
+            upstream.refill(time.monotonic())
+            cost = min(cost, upstream.burst)
+            if upstream.waiting[0] != ticket:
+                return _POLL_INTERVAL
+            if upstream.tokens >= cost:
+                upstream.tokens -= cost
+                heapq.heappop(upstream.waiting)
+                self.granted += 1
+                return 0.0
+            return min((cost - upstream.tokens) / upstream.rate, _POLL_INTERVAL)
+
+    def _abandon(self, name: str, ticket: tuple) -> None:
+        with self._lock:
+            waiting = self._upstreams[name].waiting
+            waiting.remove(ticket)
+            heapq.heapify(waiting)
+            self.rejected += 1
+
+    def _remaining(self) -> Optional[float]:
+        deadline = _deadline.get()
+        return None if deadline is None else deadline - time.monotonic()
+
+    def acquire(self, name: str, cost: float = 1.0, priority: Optional[int] = None) -> None:
+        """Block the calling thread until `cost` units are available (raises UpstreamBusy at the deadline)."""
+        ticket = self._enqueue(name, priority)
+        while True:
+            wait = self._try_take(name, ticket, cost)
+            if wait == 0.0:
+                return
+            remaining = self._remaining()
+            if remaining is not None and remaining <= 0:
+                self._abandon(name, ticket)
+                raise UpstreamBusy(name)
+            time.sleep(wait if remaining is None else min(wait, remaining))
+
+    async def aacquire(self, name: str, cost: float = 1.0, priority: Optional[int] = None) -> None:
+        """Async acquire: waits without blocking the event loop."""
+        ticket = self._enqueue(name, priority)
+        try:
+            while True:
+                wait = self._try_take(name, ticket, cost)
+                if wait == 0.0:
+                    return
+                remaining = self._remaining()
+                if remaining is not None and remaining <= 0:
+                    self._abandon(name, ticket)
+                    raise UpstreamBusy(name)
+                await asyncio.sleep(wait if remaining is None else min(wait, remaining))
+        except asyncio.CancelledError:
+            self._abandon(name, ticket)
+            raise
+
+    def refund(self, name: str, units: float) -> None:
+        """Return units reserved by acquire() but not actually used (e.g. unused completion tokens)."""
+        if units <= 0:
+            return
+        with self._lock:
+            upstream = self._upstreams[name]
+            upstream.refill(time.monotonic())
+            upstream.tokens = min(upstream.burst, upstream.tokens + units)
+
+    # ----- governed calls with retry -----
+
+    @staticmethod
+    def _backoff(attempt: int, base: float, cap: float) -> float:
+        """Full-jitter exponential backoff."""
+        return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+    def call(self, name: str, fn: Callable[..., Any], *args, cost: float = 1.0,
+             retries: int = 3, backoff: float = 0.5, **kwargs) -> Any:
+        """Run fn under the upstream's quota, retrying 429/5xx with jittered backoff."""
+        for attempt in range(retries + 1):
+            self.acquire(name, cost)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable_error(e) or attempt == retries:
+                    raise
+                self.retried += 1
+                time.sleep(self._backoff(attempt, backoff, 8.0))
+
+    async def acall(self, name: str, fn: Callable[..., Awaitable[Any]], *args, cost: float = 1.0,
+                    retries: int = 3, backoff: float = 0.5, **kwargs) -> Any:
+        """Async call(): fn is a coroutine function."""
+        for attempt in range(retries + 1):
+            await self.aacquire(name, cost)
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable_error(e) or attempt == retries:
+                    raise
+                self.retried += 1
+                await asyncio.sleep(self._backoff(attempt, backoff, 8.0))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            upstreams = {}
+            for name, upstream in self._upstreams.items():
+                upstream.refill(now)
+                upstreams[name] = {
+                    "rate": upstream.rate,
+                    "tokens": round(upstream.tokens, 2),
+                    "queued": len(upstream.waiting),
+                }
+            return {
+                "granted": self.granted,
+                "rejected": self.rejected,
+                "retried": self.retried,
+                "upstreams": upstreams,
+            }
+
+
+# Shared by every client in the process
+governor = OutboundGovernor()
@@ -9,6 +9,11 @@ Each question has:
 - required: Whether this is commonly required
 """
 
+import hashlib
+import json
+from types import MappingProxyType
+from typing import Tuple
+
 QUESTION_CATALOG = [
     # ===== 1. PERSONAL INFORMATION =====
     {
@@ -399,20 +404,41 @@ QUESTION_CATALOG = [
 ]
 
 
-def get_questions_by_category():
-    """Group questions by category for UI organization"""
+# ===== PRECOMPUTED INDEXES =====
+# The catalog is static, so lookups and response bodies are built once at import.
+
+def _json_response(payload) -> Tuple[bytes, str]:
+    """Serialized JSON body and a strong ETag derived from it."""
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _group_by_category():
     categories = {}
     for q in QUESTION_CATALOG:
-        cat = q["category"]
-        if cat not in categories:
-            categories[cat] = []
-        categories[cat].append(q)
+        categories.setdefault(q["category"], []).append(q)
     return categories
 
 
+_grouped = _group_by_category()
+
+QUESTIONS_BY_KEY = MappingProxyType({q["key"]: MappingProxyType(q) for q in QUESTION_CATALOG})
+QUESTIONS_BY_CATEGORY = MappingProxyType({
+    cat: tuple(QUESTIONS_BY_KEY[q["key"]] for q in questions) for cat, questions in _grouped.items()
+})
+
+# (body, etag) for GET /questions and GET /questions/{category}
+QUESTIONS_RESPONSE = _json_response({"categories": _grouped, "total_questions": len(QUESTION_CATALOG)})
+CATEGORY_RESPONSES = MappingProxyType({cat: _json_response(questions) for cat, questions in _grouped.items()})
+
+del _grouped
+
+
+def get_questions_by_category():
+    """Group questions by category for UI organization (read-only view)"""
+    return QUESTIONS_BY_CATEGORY
+
+
 def get_question_by_key(key: str):
-    """Retrieve a specific question by its key"""
-    for q in QUESTION_CATALOG:
-        if q["key"] == key:
-            return q
-    return None
+    """Retrieve a specific question by its key (read-only view)"""
+    return QUESTIONS_BY_KEY.get(key)
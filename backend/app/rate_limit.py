@@ -0,0 +1,198 @@
+"""
+Token-bucket rate limiting for incoming API requests.
+
+Each key (API key, user id, ...) owns a bucket of `capacity` tokens that
+refills continuously at `capacity / window` tokens per second, so bursts are
+capped at `capacity` with no fixed-window edges. Bucket state lives in a
+pluggable store:
+
+- memory: per-process, LRU-bounded
+- sqlite: a file shared by all workers on one host
+- redis:  any Redis-compatible server shared by all hosts (requires `redis`)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+def _refill(tokens: float, updated: float, now: float, capacity: float, rate: float) -> float:
+    return min(capacity, tokens + max(0.0, now - updated) * rate)
+
+
+class BucketStore(ABC):
+    """Atomic token-bucket storage. Subclasses implement take()."""
+
+    @abstractmethod
+    def take(self, key: str, capacity: float, rate: float) -> Tuple[bool, float]:
+        """
+        Try to remove one token from key's bucket.
+        Returns (allowed, retry_after_seconds).
+        take() may block (file lock, network round-trip): call it off the event loop.
+        """
+
+    def close(self) -> None:
+        pass
+
+
+class InMemoryBucketStore(BucketStore):
+    """
+    Process-local buckets. Memory stays bounded: at most max_keys buckets are
+    kept and the least recently used is evicted first. An evicted key simply
+    starts again with a full bucket.
+    """
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # key -> (tokens, updated)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def take(self, key: str, capacity: float, rate: float) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = _refill(tokens, updated, now, capacity, rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SQLiteBucketStore(BucketStore):
+    """
+    Buckets in a SQLite file, shared by every worker process on the host.
+    Each take() is one IMMEDIATE transaction, so concurrent workers serialize
+    on the file lock. Buckets idle long enough to be full again are pruned.
+    """
+
+    PRUNE_EVERY = 1000  # take() calls between prunes
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            " key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL,"
+            " full_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS buckets_full_at ON buckets (full_at)")
+        self._calls = 0
+
+    def take(self, key: str, capacity: float, rate: float) -> Tuple[bool, float]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+                tokens = _refill(row[0], row[1], now, capacity, rate) if row else capacity
+                allowed = tokens >= 1
+                if allowed:
+                    tokens -= 1
+                full_at = now + (capacity - tokens) / rate
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)",
+                    (key, tokens, now, full_at),
+                )
+                self._calls += 1
+                if self._calls % self.PRUNE_EVERY == 0:
+                    self._conn.execute("DELETE FROM buckets WHERE full_at < ?", (now,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RedisBucketStore(BucketStore):
+    """
+    Buckets in Redis (or any server speaking its protocol), shared by all
+    workers and hosts. A Lua script makes each take() atomic; keys expire
+    once their bucket would be full again.
+    """
+
+    _SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+    redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url: str, prefix: str = "jobfill:ratelimit:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise ValueError("RATE_LIMIT_BACKEND=redis requires the 'redis' package") from e
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(self._SCRIPT)
+
+    def take(self, key: str, capacity: float, rate: float) -> Tuple[bool, float]:
+        allowed, tokens = self._script(keys=[self.prefix + key], args=[capacity, rate, time.time()])
+        if int(allowed):
+            return True, 0.0
+        return False, (1 - float(tokens)) / rate
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class TokenBucketLimiter:
+    """Allows `capacity` requests per `window` seconds per key, refilled continuously."""
+
+    def __init__(self, store: BucketStore, capacity: int, window: float, prefix: str = ""):
+        self.store = store
+        self.capacity = float(capacity)
+        self.rate = capacity / window
+        self.prefix = prefix
+
+    def hit(self, key: str) -> Tuple[bool, float]:
+        """Consume one request for key. Returns (allowed, retry_after_seconds)."""
+        return self.store.take(self.prefix + key, self.capacity, self.rate)
+
+
+def create_bucket_store(backend: Optional[str] = None) -> BucketStore:
+    """
+    Build the store selected by RATE_LIMIT_BACKEND (memory | sqlite | redis).
+    sqlite requires RATE_LIMIT_SQLITE_PATH, redis uses RATE_LIMIT_REDIS_URL.
+    """
+    backend = (backend or os.getenv("RATE_LIMIT_BACKEND", "memory")).lower()
+    if backend == "memory":
+        return InMemoryBucketStore(max_keys=int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000")))
+    if backend == "sqlite":
+        path = os.getenv("RATE_LIMIT_SQLITE_PATH")
+        if not path:
+            raise ValueError("RATE_LIMIT_SQLITE_PATH must be set when RATE_LIMIT_BACKEND=sqlite")
+        return SQLiteBucketStore(path)
+    if backend == "redis":
+        return RedisBucketStore(os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0"))
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND '{backend}'")
@@ -0,0 +1,165 @@
+"""
+Semantic fallback matcher for fields the keyword stage cannot place.
+
+Every question key gets a document (its catalog question, its keywords and
+the key itself) embedded as a character n-gram TF-IDF vector. A form field
+is embedded the same way from its label, name, placeholder and context,
+and all unmatched fields of a form are scored against the whole catalog in
+one matrix multiply. Character n-grams tolerate inflections and word order
+("Surname / family name", "Postcode", "Are you open to relocating?")
+without any model or network call. They do not bridge synonyms that share
+no letters with the catalog ("Mobile no." for phone stays unmatched).
+
+A match must also beat the runner-up key by SEMANTIC_MARGIN: a label whose
+only overlap is a word several keys share ("Current CTC" vs current_company
+and current_job_title) is left unmatched instead of guessed.
+"""
+
+import math
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .matcher import KEYWORD_MAP
+from .questions import QUESTION_CATALOG
+
+# Minimum cosine similarity for a semantic match (a wrong fill is worse than a missing one)
+SEMANTIC_THRESHOLD = float(os.getenv("SEMANTIC_THRESHOLD", "0.4"))
+SEMANTIC_MATCHING = os.getenv("SEMANTIC_MATCHING", "1").lower() not in ("0", "false", "no")
+# Minimum lead of the best key over the runner-up (ambiguous matches are dropped)
+SEMANTIC_MARGIN = float(os.getenv("SEMANTIC_MARGIN", "0.05"))
+
+NGRAM_RANGE = (3, 5)
+
+# Contribution of each field attribute to the field's vector
+FIELD_WEIGHTS = (("label", 1.0), ("name", 0.5), ("placeholder", 0.6), ("context", 0.3))
+# Surrounding text is noisy; only its start is used
+CONTEXT_CHARS = 200
+
+_CAMEL_RE = re.compile(r'([a-z])([A-Z])')
+_NON_ALNUM_RE = re.compile(r'[\W_]+')
+
+# Filler that every catalog question shares
+_STOPWORDS = frozenset((
+    'what', 'is', 'are', 'your', 'you', 'the', 'a', 'an', 'of', 'or', 'for', 'to', 'in',
+    'do', 'did', 'have', 'please', 'enter', 'optional', 'e', 'g', 'this', 'if',
+))
+
+
+def _ngrams(text: str, ngram_range: Tuple[int, int] = NGRAM_RANGE) -> Dict[str, int]:
+    """Counts of the character n-grams of each word, padded with spaces at word edges."""
+    text = _NON_ALNUM_RE.sub(' ', _CAMEL_RE.sub(r'\1 \2', text).lower())
+    counts: Dict[str, int] = {}
+    low, high = ngram_range
+    for word in text.split():
+        if word in _STOPWORDS:
+            continue
+        padded = f" {word} "
+        for n in range(low, high + 1):
+            for i in range(len(padded) - n + 1):
+                gram = padded[i:i + n]
+                counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+
+class SemanticIndex:
+    """
+    Immutable TF-IDF index over one document per question key.
+    matrix is (vocabulary x keys) with L2-normalized columns, so a batch of
+    normalized query rows times matrix gives cosine similarities.
+    """
+
+    def __init__(self, documents: Dict[str, str]):
+        self.keys: Tuple[str, ...] = tuple(documents)
+        counts = [_ngrams(documents[key]) for key in self.keys]
+
+        df: Dict[str, int] = {}
+        for doc in counts:
+            for gram in doc:
+                df[gram] = df.get(gram, 0) + 1
+        self.vocabulary: Dict[str, int] = {gram: i for i, gram in enumerate(sorted(df))}
+        n = len(self.keys)
+        self.idf = np.empty(len(self.vocabulary), dtype=np.float32)
+        for gram, i in self.vocabulary.items():
+            self.idf[i] = math.log((1 + n) / (1 + df[gram])) + 1
+
+        matrix = np.zeros((len(self.vocabulary), n), dtype=np.float32)
+        for col, doc in enumerate(counts):
+            for gram, tf in doc.items():
+                matrix[self.vocabulary[gram], col] = 1 + math.log(tf)
+        matrix *= self.idf[:, None]
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=0, keepdims=True), 1e-12)
+        self.matrix = matrix
+        self.matrix.setflags(write=False)
+
+    def vectorize(self, queries: Sequence[Iterable[Tuple[str, float]]]) -> np.ndarray:
+        """
+        One L2-normalized TF-IDF row per query. A query is a list of
+        (text, weight) parts whose vectors are normalized and summed.
+        """
+        rows = np.zeros((len(queries), len(self.vocabulary)), dtype=np.float32)
+        vocabulary = self.vocabulary
+        for row, parts in enumerate(queries):
+            for text, weight in parts:
+                if not text:
+                    continue
+                indices, values = [], []
+                for gram, tf in _ngrams(text).items():
+                    i = vocabulary.get(gram)
+                    if i is not None:
+                        indices.append(i)
+                        values.append(1 + math.log(tf))
+                if not indices:
+                    continue
+                part = np.asarray(values, dtype=np.float32) * self.idf[indices]
+                rows[row, indices] += weight * part / np.linalg.norm(part)
+        rows /= np.maximum(np.linalg.norm(rows, axis=1, keepdims=True), 1e-12)
+        return rows
+
+    def scores(self, queries: Sequence[Iterable[Tuple[str, float]]]) -> np.ndarray:
+        """(queries x keys) cosine similarities, from a single matrix multiply."""
+        return self.vectorize(queries) @ self.matrix
+
+    def best_keys(
+        self,
+        queries: Sequence[Iterable[Tuple[str, float]]],
+        threshold: float = SEMANTIC_THRESHOLD,
+        margin: float = SEMANTIC_MARGIN,
+    ) -> List[Optional[str]]:
+        """
+        Best-scoring question key per query, or None below threshold or when
+        the runner-up scores within margin of it.
+        """
+        if not queries:
+            return []
+        scores = self.scores(queries)
+        best = scores.argmax(axis=1)
+        if scores.shape[1] > 1:
+            runner_up = np.partition(scores, -2, axis=1)[:, -2]
+        else:
+            runner_up = np.zeros(len(best), dtype=scores.dtype)
+        return [
+            self.keys[col] if scores[row, col] >= threshold and scores[row, col] - runner_up[row] >= margin else None
+            for row, col in enumerate(best)
+        ]
+
+
+def field_query(label: str = "", name: str = "", placeholder: str = "", context: str = "") -> List[Tuple[str, float]]:
+    """(text, weight) parts of a form field for SemanticIndex."""
+    values = {"label": label, "name": name, "placeholder": placeholder, "context": (context or "")[:CONTEXT_CHARS]}
+    return [(values[attr], weight) for attr, weight in FIELD_WEIGHTS if values[attr]]
+
+
+def _catalog_documents() -> Dict[str, str]:
+    documents: Dict[str, List[str]] = {}
+    for question in QUESTION_CATALOG:
+        documents[question["key"]] = [question["key"], question["question"]]
+    for key, keywords in KEYWORD_MAP.items():
+        documents.setdefault(key, [key]).extend(keywords)
+    return {key: " ".join(parts) for key, parts in documents.items()}
+
+
+# Built once at import time and shared by every request
+SEMANTIC_INDEX = SemanticIndex(_catalog_documents())
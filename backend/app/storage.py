@@ -0,0 +1,656 @@
+"""
+Answer storage backends.
+
+AnswerStore is the interface every backend implements; the app only talks
+to it through AsyncAnswerStore. Backends:
+
+- airtable: the Airtable UserResponses table (AirtableClient)
+- sqlite:   a local SQLite file, sub-millisecond reads and no remote quota
+- sqlite with an Airtable mirror: SQLite is the source of truth and every
+  write is replayed to Airtable in the background
+
+Any backend can sit behind a WriteBehindStore that acknowledges single
+saves immediately and flushes them in batches.
+
+The backend is chosen by ANSWER_STORE (see create_answer_store).
+"""
+
+import asyncio
+import contextvars
+import functools
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from .outbound import BULK, outbound_context
+from .questions import get_question_by_key
+
+# Answers a user must have before autofill is offered
+REQUIRED_ONBOARDING_KEYS = ('first_name', 'last_name', 'email', 'phone')
+
+# Worker threads available to AsyncAnswerStore
+STORE_THREADS = int(os.getenv('STORE_THREADS', os.getenv('AIRTABLE_THREADS', '16')))
+
+# Write-behind buffering of single-answer saves (off by default: buffered
+# writes live in process memory until flushed, which serverless hosts may freeze)
+WRITE_BEHIND = os.getenv('WRITE_BEHIND', '0').lower() in ('1', 'true', 'yes')
+WRITE_BEHIND_INTERVAL = float(os.getenv('WRITE_BEHIND_INTERVAL', '1.0'))
+WRITE_BEHIND_MAX_PENDING = int(os.getenv('WRITE_BEHIND_MAX_PENDING', '100'))
+WRITE_BEHIND_MAX_ATTEMPTS = int(os.getenv('WRITE_BEHIND_MAX_ATTEMPTS', '3'))
+
+
+def profile_version(answers: Dict[str, str]) -> str:
+    """Content hash of a user's answers; changes whenever any answer does."""
+    payload = json.dumps(answers, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class AnswerStore(ABC):
+    """
+    Per-user question/answer storage. Subclasses implement the data methods;
+    onboarding and profile helpers are built on get_all_answers().
+    """
+
+    name = "abstract"
+
+    @abstractmethod
+    def save_answer(self, user_id: str, category: str, question_key: str, question_text: str, answer: str) -> dict:
+        """Insert or update one answer. Returns the stored record ({id, fields})."""
+
+    @abstractmethod
+    def save_multiple_answers(self, user_id: str, answers: List[Dict[str, str]]) -> List[dict]:
+        """
+        Insert or update several answers (dicts with category, question_key,
+        question_text, answer; later entries for a key win).
+        Returns one result per question_key: {question_key, success, record_id, error}
+        """
+
+    @abstractmethod
+    def get_all_answers(self, user_id: str) -> Dict[str, str]:
+        """All answers for a user as {question_key: answer}."""
+
+    @abstractmethod
+    def get_answer(self, user_id: str, question_key: str) -> Optional[str]:
+        """The user's answer for one question key, or None."""
+
+    @abstractmethod
+    def get_answers_by_category(self, user_id: str, category: str) -> Dict[str, str]:
+        """Answers of one category as {question_key: answer}."""
+
+    @abstractmethod
+    def delete_all_answers(self, user_id: str) -> Dict[str, int]:
+        """Delete every answer of a user. Returns counts: {"deleted": int, "failed": int}"""
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+    def has_completed_onboarding(self, user_id: str) -> bool:
+        """
+        Check if user has completed onboarding (has at least basic required fields).
+        Required fields: first_name, last_name, email, phone
+        """
+        return self.is_onboarding_complete(self.get_all_answers(user_id))
+
+    @staticmethod
+    def is_onboarding_complete(answers: Dict[str, str]) -> bool:
+        """Onboarding check against an answers dict the caller already has."""
+        return all(key in answers and answers[key] for key in REQUIRED_ONBOARDING_KEYS)
+
+    def get_profile_snapshot(self, user_id: str) -> dict:
+        """
+        Answers, onboarding completeness, per-category answer counts and the
+        profile version from one fetch.
+        """
+        answers = self.get_all_answers(user_id)
+        category_counts: Dict[str, int] = {}
+        for key in answers:
+            question = get_question_by_key(key)
+            category = question['category'] if question else 'other'
+            category_counts[category] = category_counts.get(category, 0) + 1
+
+        return {
+            "answers": answers,
+            "completed_onboarding": self.is_onboarding_complete(answers),
+            "category_counts": category_counts,
+            "version": profile_version(answers)
+        }
+
+
+class SQLiteAnswerStore(AnswerStore):
+    """
+    Answers in a local SQLite file. One connection per store, guarded by a
+    lock, so calls within a process run one at a time (each is a single
+    indexed statement); WAL mode lets several worker processes share the file.
+    (user_id, question_key) is unique; saves are single-statement upserts.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            " id INTEGER PRIMARY KEY,"
+            " user_id TEXT NOT NULL, question_key TEXT NOT NULL,"
+            " category TEXT NOT NULL, question_text TEXT NOT NULL, answer TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS answers_user_key ON answers (user_id, question_key)")
+        # Per-user state of the import from a mirror ('imported' or 'deleted'), see MirroredAnswerStore
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS mirror_sync ("
+            " user_id TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    _UPSERT = (
+        "INSERT INTO answers (user_id, question_key, category, question_text, answer, updated_at)"
+        " VALUES (?, ?, ?, ?, ?, ?)"
+        " ON CONFLICT (user_id, question_key) DO UPDATE SET"
+        " category = excluded.category, question_text = excluded.question_text,"
+        " answer = excluded.answer, updated_at = excluded.updated_at"
+        " RETURNING id"
+    )
+
+    def save_answer(self, user_id: str, category: str, question_key: str, question_text: str, answer: str) -> dict:
+        fields = {
+            'user_id': user_id,
+            'category': category,
+            'question_key': question_key,
+            'question_text': question_text,
+            'answer': answer
+        }
+        with self._lock:
+            row = self._conn.execute(
+                self._UPSERT, (user_id, question_key, category, question_text, answer, time.time())
+            ).fetchone()
+        return {'id': str(row[0]), 'fields': fields}
+
+    def save_multiple_answers(self, user_id: str, answers: List[Dict[str, str]]) -> List[dict]:
+        """All answers are written in one transaction."""
+        pending = {ans['question_key']: ans for ans in answers}
+        now = time.time()
+        results = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for key, ans in pending.items():
+                    row = self._conn.execute(
+                        self._UPSERT, (user_id, key, ans['category'], ans['question_text'], ans['answer'], now)
+                    ).fetchone()
+                    results.append({'question_key': key, 'success': True, 'record_id': str(row[0]), 'error': None})
+                self._conn.execute("COMMIT")
+            except Exception as e:
+                self._conn.execute("ROLLBACK")
+                print(f"[SQLITE ERROR] Saving {len(pending)} answers failed: {e}")
+                return [{'question_key': key, 'success': False, 'record_id': None, 'error': str(e)} for key in pending]
+        return results
+
+    def get_all_answers(self, user_id: str) -> Dict[str, str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT question_key, answer FROM answers WHERE user_id = ?", (user_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def get_answer(self, user_id: str, question_key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT answer FROM answers WHERE user_id = ? AND question_key = ?", (user_id, question_key)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_answers_by_category(self, user_id: str, category: str) -> Dict[str, str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT question_key, answer FROM answers WHERE user_id = ? AND category = ?", (user_id, category)
+            ).fetchall()
+        return dict(rows)
+
+    def delete_all_answers(self, user_id: str, tombstone: bool = False) -> Dict[str, int]:
+        """With tombstone, the user is also marked 'deleted' so no mirror import can bring the answers back."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                deleted = self._conn.execute("DELETE FROM answers WHERE user_id = ?", (user_id,)).rowcount
+                if tombstone:
+                    self._set_sync_state(user_id, 'deleted')
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return {"deleted": deleted, "failed": 0}
+
+    # ----- mirror import state -----
+
+    def _set_sync_state(self, user_id: str, state: str) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO mirror_sync (user_id, state, updated_at) VALUES (?, ?, ?)",
+            (user_id, state, time.time()),
+        )
+
+    def sync_state(self, user_id: str) -> Optional[str]:
+        """'imported' or 'deleted' once the user was imported from (or erased in front of) a mirror, else None."""
+        with self._lock:
+            row = self._conn.execute("SELECT state FROM mirror_sync WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0] if row else None
+
+    def import_answers(self, user_id: str, answers: List[Dict[str, str]]) -> bool:
+        """
+        Store answers read from a mirror and mark the user 'imported', in one
+        transaction. Does nothing (returns False) if the user already has a
+        state, e.g. a deletion that landed while the mirror was being read.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._conn.execute("SELECT 1 FROM mirror_sync WHERE user_id = ?", (user_id,)).fetchone():
+                    self._conn.execute("ROLLBACK")
+                    return False
+                for ans in answers:
+                    self._conn.execute(
+                        self._UPSERT,
+                        (user_id, ans['question_key'], ans['category'], ans['question_text'], ans['answer'], now)
+                    ).fetchone()
+                self._set_sync_state(user_id, 'imported')
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            users, answers = self._conn.execute(
+                "SELECT COUNT(DISTINCT user_id), COUNT(*) FROM answers"
+            ).fetchone()
+        return {"path": self.path, "users": users, "answers": answers}
+
+
+class MirroredAnswerStore(AnswerStore):
+    """
+    Serves everything from `primary` and replays writes to `mirror` (e.g.
+    Airtable) on a single background thread, in order, at bulk priority.
+    Mirror failures are logged and counted, never surfaced to the caller.
+
+    With backfill, a user with no answers in the primary is looked up once
+    in the mirror and imported, so existing data carries over. Whether a
+    user was imported or deleted is stored in the primary's SQLite file, so
+    it is shared by every worker and a deleted profile is never re-imported
+    from a mirror whose delete is still queued.
+    """
+
+    def __init__(self, primary: SQLiteAnswerStore, mirror: AnswerStore, backfill: bool = True):
+        self.primary = primary
+        self.mirror = mirror
+        self.name = f"{primary.name}+{mirror.name}"
+        self.backfill = backfill
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mirror')
+        self._lock = threading.Lock()
+        self.mirror_pending = 0
+        self.mirror_failures = 0
+
+    def _mirror(self, method: str, *args) -> None:
+        with self._lock:
+            self.mirror_pending += 1
+        self._executor.submit(self._replay, method, *args)
+
+    def _replay(self, method: str, *args) -> None:
+        try:
+            # Mirror traffic never has a deadline and yields to request traffic
+            with outbound_context(BULK, timeout=math.inf):
+                getattr(self.mirror, method)(*args)
+        except Exception as e:
+            with self._lock:
+                self.mirror_failures += 1
+            print(f"[MIRROR ERROR] {self.mirror.name}.{method} failed: {e}")
+        finally:
+            with self._lock:
+                self.mirror_pending -= 1
+
+    def save_answer(self, user_id: str, category: str, question_key: str, question_text: str, answer: str) -> dict:
+        result = self.primary.save_answer(user_id, category, question_key, question_text, answer)
+        self._mirror('save_answer', user_id, category, question_key, question_text, answer)
+        return result
+
+    def save_multiple_answers(self, user_id: str, answers: List[Dict[str, str]]) -> List[dict]:
+        results = self.primary.save_multiple_answers(user_id, answers)
+        saved = {r['question_key'] for r in results if r['success']}
+        if saved:
+            self._mirror('save_multiple_answers', user_id, [a for a in answers if a['question_key'] in saved])
+        return results
+
+    def get_all_answers(self, user_id: str) -> Dict[str, str]:
+        answers = self.primary.get_all_answers(user_id)
+        if answers or not self.backfill or self.primary.sync_state(user_id):
+            return answers
+        try:
+            answers = self.mirror.get_all_answers(user_id)
+        except Exception as e:
+            # Not "no answers": the next read tries again
+            print(f"[MIRROR ERROR] Backfill of {user_id} failed: {e}")
+            raise
+        imported = []
+        for key, answer in answers.items():
+            question = get_question_by_key(key)
+            imported.append({
+                'category': question['category'] if question else 'other',
+                'question_key': key,
+                'question_text': question['question'] if question else key,
+                'answer': answer
+            })
+        if not self.primary.import_answers(user_id, imported):
+            # Deleted (or imported by another worker) while the mirror was read
+            return self.primary.get_all_answers(user_id)
+        if imported:
+            print(f"[STORAGE] Backfilled {len(imported)} answers for {user_id} from {self.mirror.name}")
+        return answers
+
+    def get_answer(self, user_id: str, question_key: str) -> Optional[str]:
+        return self.get_all_answers(user_id).get(question_key)
+
+    def get_answers_by_category(self, user_id: str, category: str) -> Dict[str, str]:
+        self.get_all_answers(user_id)  # backfill first if needed
+        return self.primary.get_answers_by_category(user_id, category)
+
+    def delete_all_answers(self, user_id: str) -> Dict[str, int]:
+        counts = self.primary.delete_all_answers(user_id, tombstone=True)
+        self._mirror('delete_all_answers', user_id)
+        return counts
+
+    def close(self) -> None:
+        """Drain queued mirror writes, then close both stores."""
+        self._executor.shutdown(wait=True)
+        self.primary.close()
+        self.mirror.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "primary": self.primary.stats(),
+            "mirror": self.mirror.stats(),
+            "mirror_pending": self.mirror_pending,
+            "mirror_failures": self.mirror_failures
+        }
+
+
+class WriteBehindStore(AnswerStore):
+    """
+    Acknowledges save_answer() immediately and writes to `inner` in the
+    background. Repeated saves of the same (user_id, question_key) coalesce
+    into the latest value; pending answers are flushed per user through
+    save_multiple_answers() every `interval` seconds, as soon as
+    `max_pending` keys are waiting, and on close().
+
+    Reads overlay pending and in-flight answers on the inner store's data,
+    so a user always sees their own writes. Bulk saves and deletes are
+    applied synchronously and supersede pending writes of the same keys.
+    A failed flush is retried up to `max_attempts` times, unless a newer
+    value for the key arrived in the meantime.
+    """
+
+    def __init__(
+        self,
+        inner: AnswerStore,
+        interval: float = WRITE_BEHIND_INTERVAL,
+        max_pending: int = WRITE_BEHIND_MAX_PENDING,
+        max_attempts: int = WRITE_BEHIND_MAX_ATTEMPTS,
+    ):
+        self.inner = inner
+        self.name = inner.name
+        self.interval = interval
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        # (user_id, question_key) -> (record, attempts); guarded by _cond
+        self._pending: Dict[tuple, tuple] = {}
+        self._inflight: Dict[tuple, tuple] = {}
+        self._cond = threading.Condition()
+        # Serializes flushes with synchronous writes so an older buffered value never lands last
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self.saved = 0
+        self.coalesced = 0
+        self.flushed = 0
+        self.failed = 0
+        self._thread = threading.Thread(target=self._flush_loop, name='write-behind', daemon=True)
+        self._thread.start()
+
+    # ----- buffered writes -----
+
+    def save_answer(self, user_id: str, category: str, question_key: str, question_text: str, answer: str) -> dict:
+        record = {
+            'user_id': user_id,
+            'category': category,
+            'question_key': question_key,
+            'question_text': question_text,
+            'answer': answer
+        }
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("WriteBehindStore is closed")
+            if (user_id, question_key) in self._pending:
+                self.coalesced += 1
+            self._pending[(user_id, question_key)] = (record, 0)
+            self.saved += 1
+            if len(self._pending) >= self.max_pending:
+                self._cond.notify()
+        return {'id': None, 'fields': record}
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._cond:
+                if not self._closed and len(self._pending) < self.max_pending:
+                    self._cond.wait(self.interval)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def flush(self) -> None:
+        """Write every pending answer to the inner store now."""
+        with self._write_lock:
+            with self._cond:
+                if not self._pending:
+                    return
+                self._inflight, self._pending = self._pending, {}
+            by_user: Dict[str, list] = {}
+            for (user_id, _), (record, attempts) in self._inflight.items():
+                by_user.setdefault(user_id, []).append((record, attempts))
+
+            retry = {}
+            for user_id, entries in by_user.items():
+                try:
+                    # Buffered writes are background traffic: like mirror replay, they yield
+                    # to request traffic and have no deadline
+                    with outbound_context(BULK, timeout=math.inf):
+                        results = self.inner.save_multiple_answers(user_id, [record for record, _ in entries])
+                    ok = {r['question_key'] for r in results if r['success']}
+                except Exception as e:
+                    print(f"[WRITE-BEHIND ERROR] Flush of {len(entries)} answers for {user_id} failed: {e}")
+                    ok = set()
+                for record, attempts in entries:
+                    if record['question_key'] in ok:
+                        self.flushed += 1
+                    elif attempts + 1 < self.max_attempts:
+                        retry[(user_id, record['question_key'])] = (record, attempts + 1)
+                    else:
+                        self.failed += 1
+                        print(f"[WRITE-BEHIND ERROR] Dropping {user_id}/{record['question_key']} after {attempts + 1} attempts")
+
+            with self._cond:
+                for key, entry in retry.items():
+                    self._pending.setdefault(key, entry)  # a newer save wins over the retry
+                self._inflight = {}
+
+    def _overlay(self, user_id: str) -> Dict[str, dict]:
+        """Unflushed records of a user (pending over in-flight), by question_key."""
+        with self._cond:
+            records = {key: record for (uid, key), (record, _) in self._inflight.items() if uid == user_id}
+            records.update({key: record for (uid, key), (record, _) in self._pending.items() if uid == user_id})
+        return records
+
+    def _drop_pending(self, user_id: str, keys: Optional[set] = None) -> None:
+        with self._cond:
+            for uid, key in list(self._pending):
+                if uid == user_id and (keys is None or key in keys):
+                    del self._pending[(uid, key)]
+
+    # ----- synchronous writes -----
+
+    def save_multiple_answers(self, user_id: str, answers: List[Dict[str, str]]) -> List[dict]:
+        with self._write_lock:
+            self._drop_pending(user_id, {a['question_key'] for a in answers})
+            return self.inner.save_multiple_answers(user_id, answers)
+
+    def delete_all_answers(self, user_id: str) -> Dict[str, int]:
+        with self._write_lock:
+            self._drop_pending(user_id)
+            return self.inner.delete_all_answers(user_id)
+
+    # ----- reads with read-your-writes -----
+
+    def get_all_answers(self, user_id: str) -> Dict[str, str]:
+        overlay = self._overlay(user_id)
+        answers = self.inner.get_all_answers(user_id)
+        if overlay:
+            answers = {**answers, **{key: record['answer'] for key, record in overlay.items()}}
+        return answers
+
+    def get_answer(self, user_id: str, question_key: str) -> Optional[str]:
+        record = self._overlay(user_id).get(question_key)
+        return record['answer'] if record else self.inner.get_answer(user_id, question_key)
+
+    def get_answers_by_category(self, user_id: str, category: str) -> Dict[str, str]:
+        overlay = self._overlay(user_id)
+        answers = self.inner.get_answers_by_category(user_id, category)
+        for key, record in overlay.items():
+            if record['category'] == category:
+                answers[key] = record['answer']
+            else:
+                answers.pop(key, None)  # recategorized by a pending save
+        return answers
+
+    def close(self) -> None:
+        """Flush everything still buffered, then close the inner store."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self.flush()
+        self.inner.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            pending = len(self._pending) + len(self._inflight)
+        return {
+            **self.inner.stats(),
+            "write_behind": {
+                "pending": pending,
+                "saved": self.saved,
+                "coalesced": self.coalesced,
+                "flushed": self.flushed,
+                "failed": self.failed
+            }
+        }
+
+
+class AsyncAnswerStore:
+    """
+    Async facade over an AnswerStore with the same methods.
+    Backends are synchronous, so every call is offloaded to a bounded thread
+    pool and awaiting it never blocks the event loop.
+    """
+
+    def __init__(self, store: AnswerStore, max_workers: int = STORE_THREADS):
+        self.sync = store
+        self.name = store.name
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='store')
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, functools.partial(ctx.run, fn, *args, **kwargs))
+
+    async def save_answer(self, user_id: str, category: str, question_key: str, question_text: str, answer: str) -> dict:
+        return await self._run(self.sync.save_answer, user_id, category, question_key, question_text, answer)
+
+    async def save_multiple_answers(self, user_id: str, answers: List[Dict[str, str]]) -> List[dict]:
+        return await self._run(self.sync.save_multiple_answers, user_id, answers)
+
+    async def get_all_answers(self, user_id: str) -> Dict[str, str]:
+        return await self._run(self.sync.get_all_answers, user_id)
+
+    async def get_answer(self, user_id: str, question_key: str) -> Optional[str]:
+        return await self._run(self.sync.get_answer, user_id, question_key)
+
+    async def get_answers_by_category(self, user_id: str, category: str) -> Dict[str, str]:
+        return await self._run(self.sync.get_answers_by_category, user_id, category)
+
+    async def delete_all_answers(self, user_id: str) -> Dict[str, int]:
+        return await self._run(self.sync.delete_all_answers, user_id)
+
+    async def has_completed_onboarding(self, user_id: str) -> bool:
+        return await self._run(self.sync.has_completed_onboarding, user_id)
+
+    async def get_profile_snapshot(self, user_id: str) -> dict:
+        return await self._run(self.sync.get_profile_snapshot, user_id)
+
+    is_onboarding_complete = staticmethod(AnswerStore.is_onboarding_complete)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.sync.stats()
+
+    def close(self) -> None:
+        """Wait for in-flight calls, then close the backend."""
+        self._executor.shutdown(wait=True)
+        self.sync.close()
+
+
+def create_answer_store(backend: Optional[str] = None) -> AnswerStore:
+    """
+    Build the store selected by ANSWER_STORE (airtable | sqlite).
+    sqlite requires ANSWER_STORE_PATH (a file on persistent storage); with ANSWER_STORE_MIRROR=airtable every
+    write is also replayed to Airtable and missing users are backfilled
+    from it (ANSWER_STORE_BACKFILL=0 turns that off).
+    WRITE_BEHIND=1 puts a WriteBehindStore in front of the backend.
+    """
+    store = _create_backend((backend or os.getenv('ANSWER_STORE', 'airtable')).lower())
+    return WriteBehindStore(store) if WRITE_BEHIND else store
+
+
+def _create_backend(backend: str) -> AnswerStore:
+    if backend == 'airtable':
+        from .airtable_client import AirtableClient
+        return AirtableClient()
+    if backend == 'sqlite':
+        # SQLite is the source of truth here: never default to a temp or ephemeral location
+        path = os.getenv('ANSWER_STORE_PATH')
+        if not path:
+            raise ValueError("ANSWER_STORE_PATH must be set when ANSWER_STORE=sqlite")
+        store: AnswerStore = SQLiteAnswerStore(path)
+        mirror = os.getenv('ANSWER_STORE_MIRROR', '').lower()
+        if mirror == 'airtable':
+            from .airtable_client import AirtableClient
+            backfill = os.getenv('ANSWER_STORE_BACKFILL', '1').lower() not in ('0', 'false', 'no')
+            store = MirroredAnswerStore(store, AirtableClient(), backfill=backfill)
+        elif mirror:
+            raise ValueError(f"Unknown ANSWER_STORE_MIRROR '{mirror}'")
+        return store
+    raise ValueError(f"Unknown ANSWER_STORE '{backend}'")
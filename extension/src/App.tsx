@@ -14,6 +14,63 @@ interface FormField {
   companyName?: string;
 }
 
+// Fill {fieldKey: value} mappings in the page. Runs inside each frame via
+// chrome.scripting.executeScript, so it must stay self-contained.
+function fillInPage(data: Record<string, any>): number {
+  let count = 0;
+
+  // Re-use findLabel helper for identification
+  const findLabel = (input: HTMLElement) => {
+    return input.getAttribute('aria-label') ||
+      (document.querySelector(`label[for="${input.id}"]`) as HTMLElement)?.innerText ||
+      input.closest('label')?.innerText || "";
+  };
+
+  for (const [id, value] of Object.entries(data)) {
+    const input = document.getElementById(id) ||
+      document.getElementsByName(id)[0] ||
+      document.querySelector(`[name="${id}"], [id="${id}"]`);
+
+    if (!input) continue;
+    const valStr = String(value).toLowerCase();
+
+    try {
+      if (input instanceof HTMLSelectElement) {
+        const option = Array.from(input.options).find(o =>
+          o.text.toLowerCase().includes(valStr) || o.value.toLowerCase().includes(valStr)
+        );
+        if (option) {
+          input.value = option.value;
+          input.dispatchEvent(new Event('change', { bubbles: true }));
+          count++;
+        }
+      }
+      else if (input instanceof HTMLInputElement && input.type === 'radio') {
+        const group = document.querySelectorAll(`input[name="${input.name}"]`);
+        group.forEach(r => {
+          const radio = r as HTMLInputElement;
+          const labelText = findLabel(radio).toLowerCase();
+          if (labelText.includes(valStr) || radio.value.toLowerCase() === valStr) {
+            radio.click();
+            radio.dispatchEvent(new Event('change', { bubbles: true }));
+            count++;
+          }
+        });
+      }
+      else {
+        const el = input as HTMLInputElement;
+        el.focus();
+        el.value = value as string;
+        el.dispatchEvent(new Event('input', { bubbles: true }));
+        el.dispatchEvent(new Event('change', { bubbles: true }));
+        el.dispatchEvent(new Event('blur', { bubbles: true }));
+        count++;
+      }
+    } catch (e) { console.error(`JobFill: Error`, e); }
+  }
+  return count;
+}
+
 function App() {
   const [fields, setFields] = useState<FormField[]>([])
   const [loading, setLoading] = useState(false)
@@ -143,7 +200,8 @@ function App() {
     setStatus('Matching your data...');
 
     try {
-      const res = await fetch(`${backendUrl}/autofill`, {
+      // Stream mappings so keyword matches are filled before LLM answers arrive
+      const res = await fetch(`${backendUrl}/autofill/stream`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json', 'x-user-id': userId },
         body: JSON.stringify({
@@ -162,77 +220,55 @@ function App() {
         throw new Error(msg || 'Failed to match fields');
       }
 
-      const { mappings, missing_fields } = await res.json();
-
-      if (missing_fields && missing_fields.length > 0 && Object.keys(mappings).length === 0) {
-        setStatus(`Could not match any fields. Try updating your profile.`);
-        return;
-      }
-
       const [tab] = await chrome.tabs.query({ active: true, currentWindow: true });
-      if (!tab?.id) return;
-
-      // Use scripting.executeScript to fill ALL frames.
-      const fillResults = await chrome.scripting.executeScript({
-        target: { tabId: tab.id, allFrames: true },
-        args: [mappings],
-        func: (data: Record<string, any>) => {
-          let count = 0;
-
-          // Re-use findLabel helper for identification
-          const findLabel = (input: HTMLElement) => {
-            return input.getAttribute('aria-label') ||
-              (document.querySelector(`label[for="${input.id}"]`) as HTMLElement)?.innerText ||
-              input.closest('label')?.innerText || "";
-          };
-
-          for (const [id, value] of Object.entries(data)) {
-            const input = document.getElementById(id) ||
-              document.getElementsByName(id)[0] ||
-              document.querySelector(`[name="${id}"], [id="${id}"]`);
-
-            if (!input) continue;
-            const valStr = String(value).toLowerCase();
-
-            try {
-              if (input instanceof HTMLSelectElement) {
-                const option = Array.from(input.options).find(o =>
-                  o.text.toLowerCase().includes(valStr) || o.value.toLowerCase().includes(valStr)
-                );
-                if (option) {
-                  input.value = option.value;
-                  input.dispatchEvent(new Event('change', { bubbles: true }));
-                  count++;
-                }
-              }
-              else if (input instanceof HTMLInputElement && input.type === 'radio') {
-                const group = document.querySelectorAll(`input[name="${input.name}"]`);
-                group.forEach(r => {
-                  const radio = r as HTMLInputElement;
-                  const labelText = findLabel(radio).toLowerCase();
-                  if (labelText.includes(valStr) || radio.value.toLowerCase() === valStr) {
-                    radio.click();
-                    radio.dispatchEvent(new Event('change', { bubbles: true }));
-                    count++;
-                  }
-                });
-              }
-              else {
-                const el = input as HTMLInputElement;
-                el.focus();
-                el.value = value as string;
-                el.dispatchEvent(new Event('input', { bubbles: true }));
-                el.dispatchEvent(new Event('change', { bubbles: true }));
-                el.dispatchEvent(new Event('blur', { bubbles: true }));
-                count++;
-              }
-            } catch (e) { console.error(`JobFill: Error`, e); }
+      if (!tab?.id || !res.body) return;
+      const tabId = tab.id;
+
+      let totalFilled = 0;
+      let mappedCount = 0;
+      let summary: { missing_fields?: unknown[] } | null = null;
+
+      // Use scripting.executeScript to fill ALL frames, one batch per network chunk.
+      const fillBatch = async (batch: Record<string, string>) => {
+        const fillResults = await chrome.scripting.executeScript({
+          target: { tabId, allFrames: true },
+          args: [batch],
+          func: fillInPage
+        });
+        totalFilled += fillResults.reduce((acc, curr) => acc + (curr.result as number || 0), 0);
+        setStatus(`Filled ${totalFilled} fields so far...`);
+      };
+
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop() || '';
+
+        const batch: Record<string, string> = {};
+        for (const line of lines) {
+          if (!line.trim()) continue;
+          const frame = JSON.parse(line);
+          if (frame.type === 'mapping') {
+            batch[frame.field_key] = frame.value;
+            mappedCount++;
+          } else if (frame.type === 'summary') {
+            summary = frame;
+          } else if (frame.type === 'error') {
+            console.error('JobFill: autofill stream error', frame.error);
           }
-          return count;
         }
-      });
+        if (Object.keys(batch).length > 0) await fillBatch(batch);
+      }
 
-      const totalFilled = fillResults.reduce((acc, curr) => acc + (curr.result as number || 0), 0);
+      if (mappedCount === 0 && summary?.missing_fields?.length) {
+        setStatus(`Could not match any fields. Try updating your profile.`);
+        return;
+      }
 
       if (totalFilled > 0) {
         setStatus(`✓ Successfully filled ${totalFilled} fields!`);
@@ -75,69 +75,83 @@ function findLabel(input: HTMLElement): string {
     return "";
 }
 
+// Fill the given {fieldKey: value} mappings. Returns the number of fields filled.
+function fillFields(data: Record<string, unknown>): number {
+    let fieldsFilled = 0;
+
+    for (const [id, value] of Object.entries(data)) {
+        // Find by ID, then Name, then Data-Attributes
+        const input = document.getElementById(id) ||
+            document.getElementsByName(id)[0] ||
+            document.querySelector(`[name="${id}"], [id="${id}"]`);
+
+        if (!input) continue;
+        const valStr = String(value).toLowerCase();
+
+        try {
+            if (input instanceof HTMLSelectElement) {
+                const option = Array.from(input.options).find(o =>
+                    o.text.toLowerCase().includes(valStr) || o.value.toLowerCase().includes(valStr)
+                );
+                if (option) {
+                    input.value = option.value;
+                    input.dispatchEvent(new Event('change', { bubbles: true }));
+                    fieldsFilled++;
+                }
+            }
+            else if (input instanceof HTMLInputElement && input.type === 'radio') {
+                const group = document.querySelectorAll(`input[name="${input.name}"]`);
+                group.forEach(r => {
+                    const radio = r as HTMLInputElement;
+                    const labelText = findLabel(radio).toLowerCase();
+                    if (labelText.includes(valStr) || radio.value.toLowerCase() === valStr) {
+                        radio.click();
+                        radio.dispatchEvent(new Event('change', { bubbles: true }));
+                        fieldsFilled++;
+                    }
+                });
+            }
+            else {
+                const el = input as HTMLInputElement;
+                el.focus();
+                el.value = value as string;
+                el.dispatchEvent(new Event('input', { bubbles: true }));
+                el.dispatchEvent(new Event('change', { bubbles: true }));
+                el.dispatchEvent(new Event('blur', { bubbles: true }));
+                fieldsFilled++;
+            }
+        } catch (e) { console.error(`JobFill: Error filling ${id}`, e); }
+    }
+
+    return fieldsFilled;
+}
+
+// Auto-Consent for terms
+function checkConsentBoxes(): number {
+    let checked = 0;
+    document.querySelectorAll('input[type="checkbox"]').forEach(cb => {
+        const checkbox = cb as HTMLInputElement;
+        if (checkbox.checked) return;
+        const text = (checkbox.closest('label')?.innerText || checkbox.parentElement?.innerText || "").toLowerCase();
+        const consentWords = ['consent', 'privacy', 'data', 'store', 'terms', 'policy', 'agree', 'acknowledge'];
+        if (consentWords.some(word => text.includes(word))) {
+            checkbox.click();
+            checked++;
+        }
+    });
+    return checked;
+}
+
 chrome.runtime.onMessage.addListener((request: any, _sender: chrome.runtime.MessageSender, sendResponse: (response?: any) => void) => {
     if (request.action === 'SCAN_FORM') {
         const fields = findFormFields();
         sendResponse({ fields, url: window.location.href });
     } else if (request.action === 'FILL_FORM') {
-        const { data } = request;
-        let fieldsFilled = 0;
-
-        for (const [id, value] of Object.entries(data)) {
-            // Find by ID, then Name, then Data-Attributes
-            const input = document.getElementById(id) ||
-                document.getElementsByName(id)[0] ||
-                document.querySelector(`[name="${id}"], [id="${id}"]`);
-
-            if (!input) continue;
-            const valStr = String(value).toLowerCase();
-
-            try {
-                if (input instanceof HTMLSelectElement) {
-                    const option = Array.from(input.options).find(o =>
-                        o.text.toLowerCase().includes(valStr) || o.value.toLowerCase().includes(valStr)
-                    );
-                    if (option) {
-                        input.value = option.value;
-                        input.dispatchEvent(new Event('change', { bubbles: true }));
-                        fieldsFilled++;
-                    }
-                }
-                else if (input instanceof HTMLInputElement && input.type === 'radio') {
-                    const group = document.querySelectorAll(`input[name="${input.name}"]`);
-                    group.forEach(r => {
-                        const radio = r as HTMLInputElement;
-                        const labelText = findLabel(radio).toLowerCase();
-                        if (labelText.includes(valStr) || radio.value.toLowerCase() === valStr) {
-                            radio.click();
-                            radio.dispatchEvent(new Event('change', { bubbles: true }));
-                            fieldsFilled++;
-                        }
-                    });
-                }
-                else {
-                    const el = input as HTMLInputElement;
-                    el.focus();
-                    el.value = value as string;
-                    el.dispatchEvent(new Event('input', { bubbles: true }));
-                    el.dispatchEvent(new Event('change', { bubbles: true }));
-                    el.dispatchEvent(new Event('blur', { bubbles: true }));
-                    fieldsFilled++;
-                }
-            } catch (e) { console.error(`JobFill: Error filling ${id}`, e); }
-        }
-
-        // Auto-Consent for terms
-        document.querySelectorAll('input[type="checkbox"]').forEach(cb => {
-            const checkbox = cb as HTMLInputElement;
-            if (checkbox.checked) return;
-            const text = (checkbox.closest('label')?.innerText || checkbox.parentElement?.innerText || "").toLowerCase();
-            const consentWords = ['consent', 'privacy', 'data', 'store', 'terms', 'policy', 'agree', 'acknowledge'];
-            if (consentWords.some(word => text.includes(word))) {
-                checkbox.click();
-                fieldsFilled++;
-            }
-        });
+        // Streaming fills send several partial batches; consent boxes are
+        // only ticked on the last one (final defaults to true).
+        const { data, final = true } = request;
+        let fieldsFilled = fillFields(data || {});
+        if (final) fieldsFilled += checkConsentBoxes();
 
         sendResponse({ success: true, count: fieldsFilled });
     }